@@ -0,0 +1,44 @@
+"""Compare one-request-per-text embedding with the batched pipeline.
+
+Usage:
+  python benchmarks/bench_embedding.py [--count 2000] [--batch-size 32] [--in-flight 4]
+"""
+import argparse
+import time
+
+from fake_services import FakeEmbeddingServer
+from n8n_mcp.embedding_client import EmbeddingClient
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--in-flight", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.02, help="Fake server latency per request (s)")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    texts = [f"Workflow Name: Synthetic workflow {i}\nNode Types:\n- n8n-nodes-base.httpRequest: {i % 7}"
+             for i in range(args.count)]
+
+    with FakeEmbeddingServer(latency=args.latency, failure_rate=args.failure_rate) as fake:
+        # No cache: the batched pass would otherwise only read what the sequential pass stored
+        client = EmbeddingClient(host=fake.url, batch_size=args.batch_size,
+                                 max_in_flight=args.in_flight, cache=None)
+
+        start = time.perf_counter()
+        sequential = [client.get_embedding(text) for text in texts]
+        sequential_seconds = time.perf_counter() - start
+
+        embeddings, stats = client.embed_all(texts)
+
+    print(f"sequential: {len(texts) / sequential_seconds:8.1f} items/s "
+          f"({sum(1 for e in sequential if e)} ok, {sequential_seconds:.2f}s)")
+    print(f"batched:    {stats['itemsPerSecond']:8.1f} items/s "
+          f"({stats['embedded']} ok, {stats['failed']} failed, {stats['seconds']:.2f}s)")
+    print(f"speedup:    {sequential_seconds / stats['seconds']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
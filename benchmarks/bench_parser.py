@@ -0,0 +1,44 @@
+"""Compare serial and parallel wall time of process_all_workflows.
+
+Usage:
+  python benchmarks/bench_parser.py [--count 5000] [--nodes 30] [--workers N]
+"""
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from synthetic import write_workflow_files
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=5000)
+    parser.add_argument("--nodes", type=int, default=30)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    from n8n_mcp import workflow_parser
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workflow_parser.WORKFLOWS_DIR = Path(tmp) / "workflows"
+        workflow_parser.OUTPUT_DIR = Path(tmp) / "processed"
+        workflow_parser.OUTPUT_DIR.mkdir()
+        write_workflow_files(workflow_parser.WORKFLOWS_DIR, args.count, node_count=args.nodes)
+
+        timings = {}
+        outputs = {}
+        for workers in (1, args.workers):
+            start = time.perf_counter()
+            outputs[workers] = workflow_parser.process_all_workflows(workers=workers)
+            timings[workers] = time.perf_counter() - start
+
+    same = [w["id"] for w in outputs[1]] == [w["id"] for w in outputs[args.workers]]
+    print(f"serial:            {timings[1]:.2f}s")
+    print(f"parallel ({args.workers:>2} workers): {timings[args.workers]:.2f}s")
+    print(f"speedup:           {timings[1] / timings[args.workers]:.1f}x (identical order: {same})")
+
+
+if __name__ == "__main__":
+    main()
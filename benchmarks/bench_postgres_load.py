@@ -0,0 +1,62 @@
+"""Compare per-row insert_workflow with the COPY-based bulk upsert.
+
+Runs against the database configured by the POSTGRES_* variables, inside a
+scratch schema (dropped afterwards) so real catalog tables are not touched.
+
+Usage:
+  python benchmarks/bench_postgres_load.py [--count 2000] [--nodes 20]
+"""
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from synthetic import write_workflow_files
+
+SCHEMA = "n8n_mcp_bench"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--nodes", type=int, default=20)
+    args = parser.parse_args()
+
+    # Route every pooled connection into the scratch schema.
+    os.environ["PGOPTIONS"] = f"-c search_path={SCHEMA},public"
+    from n8n_mcp.postgres_client import PostgresClient
+    from n8n_mcp.workflow_parser import process_workflow
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_workflow_files(Path(tmp), args.count, node_count=args.nodes)
+        workflows = [process_workflow(path) for path in paths]
+
+    client = PostgresClient()
+    if not client.connect():
+        raise SystemExit("PostgreSQL is not reachable; set the POSTGRES_* variables.")
+    client.execute_query(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE;")
+    client.execute_query(f"CREATE SCHEMA {SCHEMA};")
+    try:
+        client.create_workflows_table()
+
+        start = time.perf_counter()
+        for workflow in workflows:
+            client.insert_workflow(workflow)
+        per_row = time.perf_counter() - start
+        client.execute_query("TRUNCATE workflows CASCADE;")
+
+        bulk = client.bulk_upsert_workflows(workflows)
+        rerun = client.bulk_upsert_workflows(workflows)
+    finally:
+        client.execute_query(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE;")
+        client.disconnect()
+
+    print(f"per-row insert: {len(workflows) / per_row:10.1f} rows/s ({per_row:.2f}s)")
+    print(f"bulk upsert:    {bulk['rowsPerSecond']:10.1f} rows/s ({bulk['seconds']:.2f}s, {bulk['written']} written)")
+    print(f"bulk re-run:    {rerun['rowsPerSecond']:10.1f} rows/s ({rerun['seconds']:.2f}s, {rerun['written']} written)")
+    print(f"speedup:        {per_row / bulk['seconds']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
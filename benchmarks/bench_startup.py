@@ -0,0 +1,103 @@
+"""Measure the cold start of the MCP server in fresh interpreter processes.
+
+MCP hosts spawn one server process per session, so the time until the
+server answers its first requests is paid by every session. Each case runs
+in a new subprocess without N8N_API_KEY set:
+
+  import n8n_mcp               importing the package
+  import n8n_mcp.server        importing the server module
+  handshake                    spawn the server, initialize and list the tools
+
+It also reports which of the heavy optional modules the server import loads.
+
+Usage:
+  python benchmarks/bench_startup.py [--repeat 10] [--output PATH]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from harness import environment, measure, save_results
+
+# Modules only some tools need; importing the server should not load them
+HEAVY_MODULES = ("numpy", "psycopg2", "n8n_mcp.vector_index")
+
+
+def server_env():
+    env = dict(os.environ)
+    env.pop("N8N_API_KEY", None)
+    return env
+
+
+def python(code: str) -> str:
+    return subprocess.run(
+        [sys.executable, "-c", code], env=server_env(), check=True, capture_output=True, text=True
+    ).stdout
+
+
+def handshake():
+    """Spawn the stdio server, initialize the session and list the tools."""
+    from mcp.types import LATEST_PROTOCOL_VERSION
+
+    messages = [
+        {"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {
+            "protocolVersion": LATEST_PROTOCOL_VERSION,
+            "capabilities": {},
+            "clientInfo": {"name": "bench_startup", "version": "0"},
+        }},
+        {"jsonrpc": "2.0", "method": "notifications/initialized"},
+        {"jsonrpc": "2.0", "id": 2, "method": "tools/list"},
+    ]
+    process = subprocess.Popen(
+        [sys.executable, "-m", "n8n_mcp.main"], env=server_env(),
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+    )
+    try:
+        process.stdin.write(json.dumps(messages[0]) + "\n")
+        process.stdin.flush()
+        json.loads(process.stdout.readline())
+        for message in messages[1:]:
+            process.stdin.write(json.dumps(message) + "\n")
+        process.stdin.flush()
+        response = json.loads(process.stdout.readline())
+        if not response.get("result", {}).get("tools"):
+            raise RuntimeError(f"Unexpected tools/list response: {response}")
+    finally:
+        process.stdin.close()
+        process.wait(timeout=30)
+
+
+def bench_startup(repeat: int):
+    results = {
+        "startup.import n8n_mcp": measure(lambda: python("import n8n_mcp"), repeat),
+        "startup.import n8n_mcp.server": measure(lambda: python("import n8n_mcp.server"), repeat),
+        "startup.handshake": measure(handshake, repeat),
+    }
+    loaded = json.loads(python(
+        "import json, sys, n8n_mcp.server; "
+        f"print(json.dumps([name for name in {HEAVY_MODULES!r} if name in sys.modules]))"
+    ))
+    results["startup.import n8n_mcp.server"]["heavyModules"] = loaded
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/<timestamp>-<commit>.json)")
+    args = parser.parse_args()
+
+    results = bench_startup(args.repeat)
+    path = save_results({"environment": environment(), "settings": {"repeat": args.repeat}, "results": results},
+                        args.output)
+    for name, result in results.items():
+        print(f"{name:<30}  median {result['median'] * 1000:8.1f} ms  p95 {result['p95'] * 1000:8.1f} ms")
+    loaded = results["startup.import n8n_mcp.server"]["heavyModules"]
+    print(f"Heavy modules loaded by the server import: {', '.join(loaded) or 'none'}")
+    print(f"\nSaved to {path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
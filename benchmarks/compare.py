@@ -0,0 +1,59 @@
+"""Compare two run_all.py result files case by case.
+
+Prints the median of each case in both runs and their ratio, and exits with
+status 1 when any case is slower than the baseline by more than --threshold.
+
+Usage:
+  python benchmarks/compare.py BASELINE.json CANDIDATE.json [--threshold 0.10]
+"""
+import argparse
+import json
+import sys
+
+
+def load(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed slowdown as a fraction (default 0.10)")
+    args = parser.parse_args()
+
+    baseline, candidate = load(args.baseline), load(args.candidate)
+    for label, run in (("baseline", baseline), ("candidate", candidate)):
+        env = run.get("environment", {})
+        dirty = " (dirty)" if env.get("dirty") else ""
+        print(f"{label:<10} {str(env.get('commit'))[:10]}{dirty}  {env.get('timestamp')}  python {env.get('python')}")
+    if baseline.get("settings") != candidate.get("settings"):
+        print("warning: the runs used different settings; ratios may not be comparable")
+    print()
+
+    base_results, new_results = baseline["results"], candidate["results"]
+    names = [name for name in base_results if name in new_results]
+    width = max(map(len, names), default=10)
+    regressions = []
+    for name in names:
+        before, after = base_results[name]["median"], new_results[name]["median"]
+        ratio = after / before if before else float("inf")
+        marker = ""
+        if ratio > 1 + args.threshold:
+            marker = "  REGRESSION"
+            regressions.append(name)
+        elif ratio < 1 - args.threshold:
+            marker = "  faster"
+        print(f"{name:<{width}}  {before * 1000:10.2f} ms -> {after * 1000:10.2f} ms  {ratio:6.2f}x{marker}")
+
+    for name in sorted(set(base_results) ^ set(new_results)):
+        print(f"{name:<{width}}  only in {'baseline' if name in base_results else 'candidate'}")
+
+    if regressions:
+        print(f"\n{len(regressions)} case(s) slower than the baseline by more than {args.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""Local HTTP stand-ins for the services n8n-mcp talks to.
+
+The servers run on a background thread bound to 127.0.0.1 and an ephemeral
+port, so benchmarks can point the real clients at them without any network
+access.
+"""
+import base64
+import hashlib
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+def fake_embedding(text: str, dimension: int) -> List[float]:
+    """Deterministic pseudo-embedding derived from the text hash."""
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+    rng = random.Random(seed)
+    return [rng.uniform(-1.0, 1.0) for _ in range(dimension)]
+
+
+class _JsonHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status: int, body: Any):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _body(self) -> Any:
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+
+class _BackgroundServer(ThreadingHTTPServer):
+    """Serves on 127.0.0.1 with an ephemeral port from a daemon thread."""
+
+    daemon_threads = True
+
+    def __init__(self, handler):
+        super().__init__(("127.0.0.1", 0), handler)
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+
+class _EmbeddingHandler(_JsonHandler):
+    server: "FakeEmbeddingServer"
+
+    def do_POST(self):
+        request = self._body()
+        fake = self.server
+        with fake.lock:
+            fake.request_count += 1
+
+        if self.path == "/api/embed":
+            inputs = request.get("input", [])
+            if isinstance(inputs, str):
+                inputs = [inputs]
+            time.sleep(fake.latency + fake.per_item_latency * len(inputs))
+            if fake.rng.random() < fake.failure_rate:
+                self._reply(500, {"error": "injected failure"})
+                return
+            self._reply(200, {
+                "model": request.get("model"),
+                "embeddings": [fake_embedding(text, fake.dimension) for text in inputs],
+            })
+        elif self.path == "/api/embeddings":
+            time.sleep(fake.latency + fake.per_item_latency)
+            if fake.rng.random() < fake.failure_rate:
+                self._reply(500, {"error": "injected failure"})
+                return
+            self._reply(200, {"embedding": fake_embedding(request.get("prompt", ""), fake.dimension)})
+        else:
+            self._reply(404, {"error": "not found"})
+
+
+class FakeEmbeddingServer(_BackgroundServer):
+    """Ollama-compatible /api/embed and /api/embeddings endpoints.
+
+    ``latency`` is paid once per request and ``per_item_latency`` once per
+    embedded text, which is roughly how a real model server behaves.
+    ``failure_rate`` makes that fraction of requests answer with HTTP 500.
+    """
+
+    def __init__(self, dimension=384, latency=0.02, per_item_latency=0.001,
+                 failure_rate=0.0, seed=0):
+        super().__init__(_EmbeddingHandler)
+        self.dimension = dimension
+        self.latency = latency
+        self.per_item_latency = per_item_latency
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.request_count = 0
+
+
+class _N8nHandler(_JsonHandler):
+    server: "FakeN8nServer"
+
+    def _start(self) -> bool:
+        fake = self.server
+        with fake.lock:
+            fake.request_count += 1
+            fail = fake.rng.random() < fake.failure_rate
+        time.sleep(fake.latency)
+        if self.headers.get("X-N8N-API-KEY") != fake.api_key:
+            self._reply(401, {"message": "unauthorized"})
+            return False
+        if fail:
+            self._reply(fake.failure_status, {"message": "injected failure"})
+            return False
+        return True
+
+    def _workflow_id(self) -> Optional[str]:
+        parts = urlparse(self.path).path.rstrip("/").split("/")
+        return parts[4] if len(parts) > 4 else None
+
+    def do_GET(self):
+        if not self._start():
+            return
+        fake = self.server
+        workflow_id = self._workflow_id()
+        if workflow_id:
+            workflow = fake.workflows.get(workflow_id)
+            self._reply(200, workflow) if workflow else self._reply(404, {"message": "not found"})
+            return
+
+        query = {key: values[-1] for key, values in parse_qs(urlparse(self.path).query).items()}
+        with fake.lock:
+            workflows = list(fake.workflows.values())
+        if "active" in query:
+            workflows = [w for w in workflows if str(w.get("active", False)).lower() == query["active"]]
+        if "name" in query:
+            workflows = [w for w in workflows if w.get("name") == query["name"]]
+        if "tags" in query:
+            wanted = set(query["tags"].split(","))
+            workflows = [w for w in workflows if wanted <= {t.get("name") for t in w.get("tags", [])}]
+        offset = int(base64.b64decode(query["cursor"]).decode()) if "cursor" in query else 0
+        limit = min(int(query.get("limit", 100)), 250)
+        page = workflows[offset:offset + limit]
+        next_offset = offset + limit
+        next_cursor = base64.b64encode(str(next_offset).encode()).decode() if next_offset < len(workflows) else None
+        self._reply(200, {"data": page, "nextCursor": next_cursor})
+
+    def _save(self, workflow_id: str, body: Dict[str, Any], created: bool):
+        fake = self.server
+        workflow = dict(body)
+        workflow.update({
+            "id": workflow_id,
+            "versionId": str(uuid.uuid4()),
+            "updatedAt": time.strftime("%Y-%m-%dT%H:%M:%S.000Z", time.gmtime()),
+        })
+        if created:
+            workflow["createdAt"] = workflow["updatedAt"]
+            workflow.setdefault("active", False)
+        with fake.lock:
+            fake.workflows[workflow_id] = workflow
+        self._reply(200, workflow)
+
+    def do_POST(self):
+        if not self._start():
+            return
+        body = self._body()
+        if not isinstance(body.get("nodes"), list) or "name" not in body:
+            self._reply(400, {"message": "request/body must have required properties name, nodes"})
+            return
+        self._save(uuid.uuid4().hex[:16], body, created=True)
+
+    def do_PUT(self):
+        if not self._start():
+            return
+        workflow_id = self._workflow_id()
+        if workflow_id not in self.server.workflows:
+            self._reply(404, {"message": "not found"})
+            return
+        self._save(workflow_id, self._body(), created=False)
+
+
+class FakeN8nServer(_BackgroundServer):
+    """Minimal n8n public API: list (with cursor paging and filters), get, create and update.
+
+    ``failure_rate`` makes that fraction of requests answer with
+    ``failure_status`` (e.g. 429 or 503) to exercise retry paths.
+    """
+
+    def __init__(self, workflows: Optional[List[Dict[str, Any]]] = None, api_key="test-key",
+                 latency=0.005, failure_rate=0.0, failure_status=503, seed=0):
+        super().__init__(_N8nHandler)
+        self.workflows: Dict[str, Dict[str, Any]] = {w["id"]: w for w in (workflows or [])}
+        self.api_key = api_key
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.request_count = 0
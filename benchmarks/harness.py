@@ -0,0 +1,93 @@
+"""Timing, result files and the optional PostgreSQL fixture shared by the benchmarks."""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+POSTGRES_SCHEMA = "n8n_mcp_bench"
+
+
+def measure(func: Callable[[], Any], repeat: int = 5, warmup: int = 1, **extra) -> Dict[str, Any]:
+    """Time ``func`` ``repeat`` times after ``warmup`` untimed calls; seconds per call."""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    result = {
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "min": samples[0],
+        "max": samples[-1],
+        "p95": samples[min(len(samples) - 1, round(0.95 * (len(samples) - 1)))],
+        "repeat": repeat,
+    }
+    result.update(extra)
+    return result
+
+
+def git_revision() -> Dict[str, Any]:
+    def git(*args):
+        return subprocess.run(["git", *args], cwd=REPO_ROOT, capture_output=True, text=True).stdout.strip()
+    try:
+        return {"commit": git("rev-parse", "HEAD") or None, "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+    except OSError:
+        return {"commit": None, "dirty": None}
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpuCount": os.cpu_count(),
+        **git_revision(),
+    }
+
+
+def save_results(results: Dict[str, Any], output: Optional[str] = None) -> Path:
+    """Write results to ``output`` or ``benchmarks/results/<timestamp>-<commit>.json``."""
+    if output:
+        path = Path(output)
+    else:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        commit = (results.get("environment", {}).get("commit") or "unknown")[:10]
+        path = RESULTS_DIR / f"{stamp}-{commit}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    return path
+
+
+def route_postgres_to_scratch_schema():
+    """Send every new PostgreSQL connection to the scratch schema; call before connecting."""
+    os.environ["PGOPTIONS"] = f"-c search_path={POSTGRES_SCHEMA},public"
+
+
+@contextmanager
+def postgres_fixture(client) -> Iterator[Optional[Any]]:
+    """Yield ``client`` inside a freshly created scratch schema, or None when unreachable.
+
+    route_postgres_to_scratch_schema() must have run before the client's
+    pool was created. The schema is dropped afterwards.
+    """
+    if not client.connect():
+        yield None
+        return
+    client.execute_query(f"DROP SCHEMA IF EXISTS {POSTGRES_SCHEMA} CASCADE;")
+    client.execute_query(f"CREATE SCHEMA {POSTGRES_SCHEMA};")
+    try:
+        client.create_workflows_table()
+        yield client
+    finally:
+        client.execute_query(f"DROP SCHEMA IF EXISTS {POSTGRES_SCHEMA} CASCADE;")
@@ -0,0 +1,208 @@
+"""Run the benchmark suite and save the timings as JSON.
+
+Every case runs against synthetic workflows and the local fake n8n and
+embedding servers, so results are reproducible without real services.
+With --postgres, the PostgreSQL-backed tool paths also run, inside a
+scratch schema of the database configured by the POSTGRES_* variables.
+Otherwise the server is benchmarked on its local vector index fallback.
+The startup cases time server cold starts in fresh processes.
+
+Results go to benchmarks/results/<timestamp>-<commit>.json (or --output);
+compare two runs with benchmarks/compare.py.
+
+Usage:
+  python benchmarks/run_all.py [--quick] [--postgres] [--only library|tool|startup] [--output PATH]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+from bench_startup import bench_startup
+from fake_services import FakeEmbeddingServer, FakeN8nServer
+from harness import environment, measure, postgres_fixture, route_postgres_to_scratch_schema, save_results
+from synthetic import generate_workflow, generate_workflows, write_workflow_files
+
+SIZES = {
+    "full": {"workflows": 2000, "small_nodes": 30, "large_nodes": 2000, "index_docs": 20000, "repeat": 7},
+    "quick": {"workflows": 200, "small_nodes": 30, "large_nodes": 500, "index_docs": 2000, "repeat": 3},
+}
+
+
+@contextlib.contextmanager
+def quiet():
+    """Swallow the progress prints of the code under test."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def bench_library(sizes, tmp: Path):
+    import numpy as np
+    from n8n_mcp import workflow_parser
+    from n8n_mcp.embedding_client import EmbeddingClient
+    from n8n_mcp.vector_index import VectorIndex
+    from n8n_mcp.workflow_validator import validate_workflow
+
+    repeat = sizes["repeat"]
+    results = {}
+    for label, nodes in (("small", sizes["small_nodes"]), ("large", sizes["large_nodes"])):
+        path = tmp / f"{label}.json"
+        path.write_text(json.dumps(generate_workflow(0, node_count=nodes)), encoding="utf-8")
+        results[f"parser.process_workflow[{nodes} nodes]"] = measure(
+            lambda: workflow_parser.process_workflow(path), repeat)
+        workflow = generate_workflow(0, node_count=nodes)
+        results[f"validator.validate_workflow[{nodes} nodes]"] = measure(
+            lambda: validate_workflow(workflow), repeat)
+
+    files_dir = tmp / "parser-input"
+    files = write_workflow_files(files_dir, sizes["workflows"], node_count=sizes["small_nodes"])
+    with quiet():
+        results[f"parser.process_workflow_files[{len(files)} files, serial]"] = measure(
+            lambda: workflow_parser.process_workflow_files(files, tmp / "parser-output", workers=1),
+            max(1, repeat // 2), warmup=0, items=len(files))
+
+    rng = np.random.default_rng(0)
+    docs = rng.standard_normal((sizes["index_docs"], 384)).astype(np.float32)
+    query = rng.standard_normal(384).astype(np.float32)
+    client = EmbeddingClient(host="http://unused", cache=None)
+    results[f"embedding.search_similar[{len(docs)} docs]"] = measure(
+        lambda: client.search_similar(query, docs, top_k=10), repeat)
+    index = VectorIndex()
+    index.add([str(i) for i in range(len(docs))], docs)
+    results[f"vector_index.search[{len(docs)} docs]"] = measure(lambda: index.search(query, 10), repeat * 10)
+
+    texts = [f"Synthetic workflow description {i}" for i in range(sizes["workflows"])]
+    with FakeEmbeddingServer(latency=0.005, per_item_latency=0.0002) as fake:
+        client = EmbeddingClient(host=fake.url, cache=None)
+        results[f"embedding.embed_all[{len(texts)} texts]"] = measure(
+            lambda: client.embed_all(texts), max(1, repeat // 2), warmup=0, items=len(texts))
+    return results
+
+
+def bench_tools(sizes, tmp: Path, workflows, use_postgres: bool):
+    """The MCP tool handlers end to end, against the fake servers configured by main()."""
+    from n8n_mcp import server, workflow_parser
+
+    repeat = sizes["repeat"]
+    results = {}
+    workflow_parser.WORKFLOWS_DIR = tmp / "workflows"
+    workflow_parser.OUTPUT_DIR = server.OUTPUT_DIR = tmp / "processed"
+    workflow_parser.OUTPUT_DIR.mkdir()
+    write_workflow_files(workflow_parser.WORKFLOWS_DIR, sizes["workflows"], node_count=sizes["small_nodes"])
+
+    def call(name, arguments=None):
+        with quiet():
+            return asyncio.run(server.handle_call_tool(name, arguments or {}))
+
+    def run_job(name):
+        """Start a job tool and wait for it, so the case times the whole job."""
+        result = json.loads(call(name, {"wait": server.MAX_JOB_WAIT})[0].text)
+        if result.get("status") != "success":
+            raise RuntimeError(f"{name} did not finish: {result}")
+        return result
+
+    def uncached(name, arguments=None):
+        server.get_n8n_client().invalidate()
+        server.validation_cache = type(server.validation_cache)()
+        return call(name, arguments)
+
+    workflow_id = workflows[0]["id"]
+    results["tool.list_workflows[limit 50]"] = measure(lambda: uncached("list_workflows", {"limit": 50}), repeat)
+    results["tool.get_workflow[uncached]"] = measure(
+        lambda: uncached("get_workflow", {"workflow_id": workflow_id}), repeat)
+    results["tool.get_workflow[cached]"] = measure(lambda: call("get_workflow", {"workflow_id": workflow_id}), repeat)
+    results["tool.validate_workflow"] = measure(
+        lambda: uncached("validate_workflow", {"workflow_id": workflow_id}), repeat)
+    results[f"tool.validate_all_workflows[{len(workflows)}, cold]"] = measure(
+        lambda: uncached("validate_all_workflows"), max(1, repeat // 2), items=len(workflows))
+    results[f"tool.validate_all_workflows[{len(workflows)}, warm]"] = measure(
+        lambda: call("validate_all_workflows"), repeat, items=len(workflows))
+
+    postgres = contextlib.nullcontext(None)
+    if use_postgres:
+        postgres = postgres_fixture(server.get_postgres_client())
+    else:
+        # Exercise the local vector index fallback instead of a real database
+        server.get_postgres_client().connect = lambda: False
+    with quiet(), postgres as database:
+        if use_postgres and database is None:
+            raise SystemExit("PostgreSQL is not reachable; set the POSTGRES_* variables or drop --postgres.")
+        if database is not None:
+            results[f"tool.load_workflows_to_postgres[{len(workflows)}]"] = measure(
+                lambda: run_job("load_workflows_to_postgres"), 1, warmup=0, items=len(workflows))
+        results[f"tool.vectorize_workflows[{len(workflows)}, initial]"] = measure(
+            lambda: run_job("vectorize_workflows"), 1, warmup=0, items=len(workflows))
+        results[f"tool.vectorize_workflows[{len(workflows)}, unchanged]"] = measure(
+            lambda: run_job("vectorize_workflows"), max(1, repeat // 2), warmup=0, items=len(workflows))
+        modes = ("hybrid", "keyword", "vector") if database is not None else ("vector",)
+        for mode in modes:
+            results[f"tool.search_similar_workflows[{mode}]"] = measure(
+                lambda: call("search_similar_workflows", {"query": "slack webhook", "mode": mode, "top_k": 10}),
+                repeat)
+        if database is not None:
+            # The fake n8n serves the same ids as the files; rows loaded from files are never
+            # overwritten by a sync, so drop them to time a full initial sync
+            database.execute_query("DELETE FROM workflows WHERE source = 'file';")
+            results[f"tool.sync_workflows[{len(workflows)}, initial]"] = measure(
+                lambda: run_job("sync_workflows"), 1, warmup=0, items=len(workflows))
+            results[f"tool.sync_workflows[{len(workflows)}, unchanged]"] = measure(
+                lambda: run_job("sync_workflows"), max(1, repeat // 2), warmup=0, items=len(workflows))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--quick", action="store_true", help="Smaller inputs and fewer repeats")
+    parser.add_argument("--postgres", action="store_true", help="Also benchmark the PostgreSQL tool paths")
+    parser.add_argument("--only", choices=["library", "tool", "startup"], help="Run only one group of cases")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/<timestamp>-<commit>.json)")
+    args = parser.parse_args()
+
+    sizes = SIZES["quick" if args.quick else "full"]
+    workflows = generate_workflows(sizes["workflows"], node_count=sizes["small_nodes"])
+    results = {}
+    # The server reads its configuration on import, so the fakes start before any n8n_mcp import
+    with FakeN8nServer(workflows, latency=0.002) as n8n, FakeEmbeddingServer(latency=0.005) as embedder, \
+            tempfile.TemporaryDirectory() as tmp:
+        os.environ.update({
+            "N8N_HOST": n8n.url,
+            "N8N_API_KEY": n8n.api_key,
+            "EMBEDDING_MODEL_HOST": embedder.url,
+            # Measure the embedding round trip rather than cache hits
+            "EMBEDDING_CACHE_SIZE": "0",
+            "EMBEDDING_CACHE_PATH": "",
+            "LOCAL_VECTOR_INDEX_PATH": str(Path(tmp) / "index" / "workflows"),
+        })
+        if args.postgres:
+            route_postgres_to_scratch_schema()
+
+        if args.only in (None, "library"):
+            library_dir = Path(tmp) / "library"
+            library_dir.mkdir()
+            results.update(bench_library(sizes, library_dir))
+        if args.only in (None, "tool"):
+            tools_dir = Path(tmp) / "tools"
+            tools_dir.mkdir()
+            results.update(bench_tools(sizes, tools_dir, workflows, args.postgres))
+        if args.only in (None, "startup"):
+            results.update(bench_startup(sizes["repeat"]))
+
+    path = save_results({
+        "environment": environment(),
+        "settings": {**sizes, "postgres": args.postgres},
+        "results": results,
+    }, args.output)
+
+    width = max(map(len, results))
+    for name, result in results.items():
+        print(f"{name:<{width}}  median {result['median'] * 1000:10.2f} ms  p95 {result['p95'] * 1000:10.2f} ms")
+    print(f"\nSaved to {path}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
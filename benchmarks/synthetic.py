@@ -0,0 +1,117 @@
+"""Synthetic n8n workflow generator for benchmarks.
+
+Workflows look like exports from the n8n UI: a trigger, a mix of common node
+types, optional sticky notes and ``main`` connections between nodes.
+Everything is driven by a seeded RNG so runs are reproducible.
+"""
+import json
+import random
+from pathlib import Path
+from typing import Any, Dict, List
+
+NODE_TYPES = [
+    "n8n-nodes-base.httpRequest",
+    "n8n-nodes-base.set",
+    "n8n-nodes-base.if",
+    "n8n-nodes-base.code",
+    "n8n-nodes-base.merge",
+    "n8n-nodes-base.gmail",
+    "n8n-nodes-base.postgres",
+    "n8n-nodes-base.googleSheets",
+    "n8n-nodes-base.slack",
+    "@n8n/n8n-nodes-langchain.openAi",
+    "@n8n/n8n-nodes-langchain.agent",
+    "n8n-nodes-base.supabase",
+]
+TRIGGER_TYPES = ["n8n-nodes-base.webhook", "n8n-nodes-base.scheduleTrigger", "n8n-nodes-base.manualTrigger"]
+CATEGORIES = ["marketing", "sales", "devops", "ai", "finance", "support"]
+WORDS = (
+    "fetch the records from the api then transform each item and store the result in the "
+    "database send a summary email when the job finishes handle errors by retrying the request"
+).split()
+
+
+def _sentence(rng: random.Random, length: int) -> str:
+    words: List[str] = []
+    size = 0
+    while size < length:
+        word = rng.choice(WORDS)
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words)
+
+
+def generate_workflow(index: int, node_count: int = 20, sticky_notes: int = 2,
+                      sticky_chars: int = 400, connection_density: float = 1.2,
+                      seed: int = 0) -> Dict[str, Any]:
+    """Build one workflow.
+
+    ``connection_density`` is the average number of outgoing ``main``
+    connections per node; sticky notes are added on top of ``node_count``.
+    """
+    rng = random.Random(seed * 1_000_003 + index)
+    nodes: List[Dict[str, Any]] = []
+    for i in range(node_count):
+        node_type = rng.choice(TRIGGER_TYPES) if i == 0 else rng.choice(NODE_TYPES)
+        base = node_type.split(".")[-1]
+        # Roughly a third of nodes keep their default name, like real exports.
+        name = f"{base} {i}" if rng.random() < 0.33 else f"Step {i} {_sentence(rng, 12)}"
+        parameters: Dict[str, Any] = {"value": _sentence(rng, 30)}
+        if rng.random() < 0.2:
+            parameters["headerParameters"] = {"parameters": [{"name": "Authorization", "value": "={{ $json.token }}"}]}
+        nodes.append({
+            "id": f"node-{index}-{i}",
+            "name": name,
+            "type": node_type,
+            "typeVersion": 1,
+            "position": [i * 220, rng.randint(0, 600)],
+            "parameters": parameters,
+        })
+    for j in range(sticky_notes):
+        nodes.append({
+            "id": f"sticky-{index}-{j}",
+            "name": f"Sticky Note {j}",
+            "type": "n8n-nodes-base.stickyNote",
+            "typeVersion": 1,
+            "position": [j * 400, -300],
+            "parameters": {"content": _sentence(rng, sticky_chars)},
+        })
+
+    connections: Dict[str, Any] = {}
+    for i in range(node_count - 1):
+        fan_out = max(1, round(rng.expovariate(1 / connection_density))) if connection_density > 0 else 0
+        targets = sorted({rng.randint(i + 1, node_count - 1) for _ in range(fan_out)})
+        if targets:
+            connections[nodes[i]["name"]] = {
+                "main": [[{"node": nodes[t]["name"], "type": "main", "index": 0} for t in targets]]
+            }
+
+    workflow: Dict[str, Any] = {
+        "id": f"synthetic-{seed}-{index}",
+        "name": f"Synthetic workflow {index}",
+        "nodes": nodes,
+        "connections": connections,
+        "settings": {"executionOrder": "v1"},
+        "tags": [{"name": rng.choice(CATEGORIES)}] if rng.random() < 0.7 else [],
+        "active": rng.random() < 0.5,
+        "versionId": f"v-{seed}-{index}",
+        "updatedAt": "2025-01-01T00:00:00.000Z",
+    }
+    return workflow
+
+
+def generate_workflows(count: int, **kwargs) -> List[Dict[str, Any]]:
+    return [generate_workflow(i, **kwargs) for i in range(count)]
+
+
+def write_workflow_files(directory: Path, count: int, **kwargs) -> List[Path]:
+    """Write ``count`` workflows as ``<category>:<name>.json`` files, like WORKFLOWS_DIR."""
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for i in range(count):
+        workflow = generate_workflow(i, **kwargs)
+        category = CATEGORIES[i % len(CATEGORIES)]
+        path = directory / f"{category}:synthetic-{i}.json"
+        path.write_text(json.dumps(workflow), encoding="utf-8")
+        paths.append(path)
+    return paths
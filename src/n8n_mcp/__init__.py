@@ -1,9 +1,16 @@
-from . import server
-import asyncio
+import importlib
 
 def main():
     """Main entry point for the package."""
+    # The server module is imported on demand so importing the package stays cheap
+    import asyncio
+    server = importlib.import_module(".server", __name__)
     asyncio.run(server.main())
 
+def __getattr__(name):
+    if name == "server":
+        return importlib.import_module(".server", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 # Optionally expose other important items at package level
-__all__ = ['main', 'server']
\ No newline at end of file
+__all__ = ['main', 'server']
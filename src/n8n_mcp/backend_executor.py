@@ -0,0 +1,49 @@
+import os
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict
+
+# Backend name -> (environment variable, default number of concurrent calls)
+BACKEND_LIMITS = {
+    "n8n": ("N8N_MAX_CONCURRENCY", 8),
+    "embedding": ("EMBEDDING_MAX_CONCURRENCY", 4),
+    "postgres": ("POSTGRES_MAX_CONCURRENCY", 10),
+    "local": ("LOCAL_MAX_CONCURRENCY", 2),
+}
+
+class BackendExecutor:
+    """Runs blocking client calls on one bounded thread pool per backend.
+
+    Tool handlers await run() instead of calling requests/psycopg2 directly,
+    so a slow call only occupies a worker of its own backend and the event
+    loop keeps serving other requests. Calls beyond a backend's limit queue
+    until a worker frees up.
+    """
+
+    def __init__(self, limits: Dict[str, int] = None):
+        self.limits = {
+            backend: int(os.getenv(env_var, default))
+            for backend, (env_var, default) in BACKEND_LIMITS.items()
+        }
+        self.limits.update(limits or {})
+        self._pools: Dict[str, ThreadPoolExecutor] = {}
+
+    def _pool(self, backend: str) -> ThreadPoolExecutor:
+        if backend not in self._pools:
+            if backend not in self.limits:
+                raise ValueError(f"Unknown backend: {backend}")
+            self._pools[backend] = ThreadPoolExecutor(
+                max_workers=self.limits[backend], thread_name_prefix=f"n8n-mcp-{backend}"
+            )
+        return self._pools[backend]
+
+    async def run(self, backend: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run func(*args, **kwargs) on the backend's pool and await the result."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool(backend), partial(func, *args, **kwargs))
+
+    def shutdown(self):
+        for pool in self._pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        self._pools.clear()
@@ -0,0 +1,193 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+# Fields the n8n API accepts when creating or updating a workflow
+IMPORT_FIELDS = ("name", "nodes", "connections", "settings", "staticData")
+# Completed imports between checkpoint writes
+CHECKPOINT_EVERY = 20
+
+class RateLimiter:
+    """Token bucket shared by threads: at most rate calls per second, in bursts of up to burst."""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+def import_payload(workflow: Dict[str, Any]) -> Dict[str, Any]:
+    """The part of an exported or processed workflow that n8n accepts on import."""
+    workflow = workflow.get("originalWorkflow", workflow)
+    # Skip nulls (n8n lists staticData: null) so a listed workflow hashes like its export
+    payload = {field: workflow[field] for field in IMPORT_FIELDS if workflow.get(field) is not None}
+    payload.setdefault("settings", {})
+    return payload
+
+def payload_hash(payload: Dict[str, Any]) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+def iter_import_sources(path) -> Iterator[Tuple[str, Optional[Dict[str, Any]], Optional[str]]]:
+    """Yield (source, workflow, error) from a directory of *.json files or a JSONL file.
+
+    source identifies the entry (file path, or file:line for JSONL) and is
+    used in error messages.
+    """
+    path = Path(path)
+    if path.is_dir():
+        for file_path in sorted(path.rglob("*.json")):
+            try:
+                with open(file_path, "r", encoding="utf-8") as f:
+                    yield str(file_path), json.load(f), None
+            except (OSError, ValueError) as e:
+                yield str(file_path), None, str(e)
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield f"{path}:{line_number}", json.loads(line), None
+            except ValueError as e:
+                yield f"{path}:{line_number}", None, str(e)
+
+def load_checkpoint(checkpoint_path) -> Dict[str, Dict[str, str]]:
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        with open(checkpoint_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+def save_checkpoint(checkpoint_path, checkpoint: Dict[str, Dict[str, str]]):
+    tmp_path = f"{checkpoint_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, checkpoint_path)
+
+def import_workflows(
+    client,
+    path,
+    checkpoint_path: Optional[str] = None,
+    concurrency: Optional[int] = None,
+    rate: Optional[float] = None,
+    match_existing: bool = False,
+) -> Dict[str, Any]:
+    """Create or update every workflow from path in n8n.
+
+    Each source workflow is keyed by its id, or by its name when it has
+    none. The checkpoint file maps that key to the hash of the last imported
+    payload and the id n8n assigned. Unchanged workflows are skipped, and
+    changed ones update their earlier import instead of creating a copy. An
+    interrupted run resumes where it stopped. Identical payloads within one
+    run are imported once. With match_existing, workflows not in the
+    checkpoint update the target workflow with the same name, if there is one.
+
+    Requests run on concurrency threads (N8N_IMPORT_CONCURRENCY), limited to
+    rate requests per second (N8N_IMPORT_RATE; 0 for no limit). Each request
+    is retried by client.request on 429/5xx.
+    """
+    if concurrency is None:
+        concurrency = int(os.getenv("N8N_IMPORT_CONCURRENCY", "4"))
+    if rate is None:
+        rate = float(os.getenv("N8N_IMPORT_RATE", "5"))
+    limiter = RateLimiter(rate)
+    checkpoint = load_checkpoint(checkpoint_path)
+    existing_ids, existing_hashes = {}, {}
+    for workflow in client.get_workflows():
+        if workflow.get("id") and workflow.get("name"):
+            existing_ids[workflow["name"]] = workflow["id"]
+            existing_hashes[payload_hash(import_payload(workflow))] = workflow["id"]
+
+    stats = {"total": 0, "created": 0, "updated": 0, "skipped": 0, "duplicates": 0, "failed": 0}
+    errors = []
+    seen_hashes = set()
+    lock = threading.Lock()
+    started = time.perf_counter()
+
+    def push(key, payload, content_hash, target_id):
+        limiter.acquire()
+        if target_id:
+            result = client.request("PUT", f"/api/v1/workflows/{target_id}", json=payload)
+            return key, content_hash, result.get("id", target_id), "updated"
+        result = client.request("POST", "/api/v1/workflows", json=payload)
+        return key, content_hash, result["id"], "created"
+
+    def finish(future, source):
+        try:
+            key, content_hash, target_id, outcome = future.result()
+        except Exception as e:
+            with lock:
+                stats["failed"] += 1
+                errors.append(f"{source}: {e}")
+            return
+        with lock:
+            stats[outcome] += 1
+            checkpoint[key] = {"hash": content_hash, "targetId": target_id}
+            done = stats["created"] + stats["updated"]
+            if checkpoint_path and done % CHECKPOINT_EVERY == 0:
+                save_checkpoint(checkpoint_path, checkpoint)
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="n8n-import") as executor:
+        in_flight = deque()
+        for source, workflow, error in iter_import_sources(path):
+            stats["total"] += 1
+            if error or not isinstance(workflow, dict):
+                stats["failed"] += 1
+                errors.append(f"{source}: {error or 'not a workflow object'}")
+                continue
+            payload = import_payload(workflow)
+            if not payload.get("name") or not isinstance(payload.get("nodes"), list):
+                stats["failed"] += 1
+                errors.append(f"{source}: workflow needs a name and a list of nodes")
+                continue
+
+            key = str(workflow.get("originalWorkflow", workflow).get("id") or payload["name"])
+            content_hash = payload_hash(payload)
+            previous = checkpoint.get(key)
+            if previous and previous["hash"] == content_hash:
+                stats["skipped"] += 1
+                continue
+            if content_hash in seen_hashes:
+                stats["duplicates"] += 1
+                continue
+            seen_hashes.add(content_hash)
+            if not previous and content_hash in existing_hashes:
+                # Already in n8n with this exact content, e.g. from a run without a checkpoint
+                stats["skipped"] += 1
+                checkpoint[key] = {"hash": content_hash, "targetId": existing_hashes[content_hash]}
+                continue
+
+            target_id = previous["targetId"] if previous else (existing_ids.get(payload["name"]) if match_existing else None)
+            in_flight.append((executor.submit(push, key, payload, content_hash, target_id), source))
+            # Keep the queue short so large imports do not hold every payload in memory
+            while len(in_flight) >= concurrency * 4:
+                finish(*in_flight.popleft())
+        while in_flight:
+            finish(*in_flight.popleft())
+
+    if checkpoint_path:
+        save_checkpoint(checkpoint_path, checkpoint)
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    stats["errors"] = errors[:50]
+    return stats
@@ -0,0 +1,134 @@
+import os
+import json
+import threading
+from collections import Counter, OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from n8n_mcp.workflow_cache import workflow_version
+from n8n_mcp.workflow_validator import validate_workflow
+
+def options_key(options: Optional[Dict[str, Any]]) -> str:
+    """Canonical form of validator options, so equal options share cache entries."""
+    return json.dumps(options or {}, sort_keys=True, default=str)
+
+class ValidationCache:
+    """LRU of validation results keyed by (workflow id, version, options).
+
+    A workflow is only re-validated when n8n reports a new versionId (or
+    updatedAt) for it, or when it is checked with different options.
+    Workflows without a version are never cached.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None):
+        if max_entries is None:
+            max_entries = int(os.getenv("VALIDATION_CACHE_MAX_ENTRIES", "10000"))
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(workflow: Dict[str, Any], options: Optional[Dict[str, Any]]) -> Optional[Tuple[str, str, str]]:
+        version = workflow_version(workflow)
+        if not workflow.get("id") or version is None:
+            return None
+        return workflow["id"], version, options_key(options)
+
+    def get(self, key: Optional[Hashable]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            result = self._entries.get(key) if key is not None else None
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def set(self, key: Optional[Hashable], result: Dict[str, Any]):
+        if key is None or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+        }
+
+def validate_workflows(
+    workflows: List[Dict[str, Any]],
+    options: Optional[Dict[str, Any]] = None,
+    cache: Optional[ValidationCache] = None,
+) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """Validate many workflows, reusing cached results for unchanged ones.
+
+    Workflows missing from the cache are validated serially: pickling a
+    workflow to a worker process costs about as much as validating it.
+    Results keep the order of workflows. Returns the results and counts of
+    validated and cached ones.
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * len(workflows)
+    keys = [ValidationCache.key(workflow, options) if cache is not None else None for workflow in workflows]
+    pending = []
+    for position, (workflow, key) in enumerate(zip(workflows, keys)):
+        cached = cache.get(key) if cache is not None else None
+        if cached is not None:
+            results[position] = cached
+        else:
+            pending.append(position)
+
+    for position in pending:
+        result = validate_workflow(workflows[position], options)
+        results[position] = result
+        if cache is not None:
+            cache.set(keys[position], result)
+
+    return results, {"validated": len(pending), "cached": len(workflows) - len(pending)}
+
+def summarize_validation(results: List[Dict[str, Any]], include_passed: bool = False) -> Dict[str, Any]:
+    """Aggregate validation results into totals, per-rule counts and per-workflow findings.
+
+    Rule counts are the number of workflows failing each rule. Workflows
+    that passed are only listed when include_passed is set.
+    """
+    rule_counts: Counter = Counter()
+    category_counts: Counter = Counter()
+    workflows = []
+    for result in results:
+        failed_rules = []
+        for category, category_result in result["results"].items():
+            if not category_result["passed"]:
+                category_counts[category] += 1
+            failed_rules.extend(category_result.get("rules", []))
+        rule_counts.update(failed_rules)
+        if include_passed or not result["passed"]:
+            workflows.append({
+                "id": result["workflow"]["id"],
+                "name": result["workflow"]["name"],
+                "passed": result["passed"],
+                "totalIssues": result["totalIssues"],
+                "rules": failed_rules,
+                "issues": [issue for r in result["results"].values() for issue in r["issues"]],
+            })
+
+    passed = sum(1 for result in results if result["passed"])
+    return {
+        "total": len(results),
+        "passed": passed,
+        "failed": len(results) - passed,
+        "totalIssues": sum(result["totalIssues"] for result in results),
+        "ruleCounts": dict(rule_counts.most_common()),
+        "categoryCounts": dict(category_counts.most_common()),
+        "workflows": workflows,
+    }
@@ -1,17 +1,31 @@
+import os
+import sys
 import argparse
 import json
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from pathlib import Path
-from src.workflow_validator import validate_workflow
-from src.n8n_api_client import N8nApiClient
-import asyncio
-from src.utils.file_utils import read_json_file
+from typing import Any, Dict, Iterator, List, TextIO
+from xml.sax.saxutils import escape, quoteattr
+from n8n_mcp.workflow_validator import validate_workflow
+from n8n_mcp.n8n_api_client import N8nApiClient
+from n8n_mcp.bulk_importer import import_workflows
+
+# Files handed to a worker process per task in directory mode
+VALIDATION_CHUNK_SIZE = 16
+
+def read_json_file(file_path):
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
 
 def show_help():
     print("""
 n8n Workflow Validator and Importer CLI
 
 Usage:
-  python -m src.cli [command] [options]
+  python -m n8n_mcp.cli [command] [options]
 
 Commands:
   validate                  Validate a workflow
@@ -22,24 +36,147 @@ Options:
   -s, --strictness LEVEL    Set validation strictness (low, medium, high)
   -v, --validators LIST     Comma-separated list of validators to run
   -f, --file PATH           Path to a workflow file
+  -d, --dir PATH            Validate or import every *.json file under a directory
+  --jsonl PATH              Import workflows from a JSONL file, one per line
+  --checkpoint PATH         Bulk import checkpoint file for skipping and resuming
+  --rate N                  Bulk import requests per second (0 = unlimited)
+  --concurrency N           Concurrent bulk import requests
+  --match-existing          Bulk import updates workflows with the same name
+  --format FORMAT           Directory mode output: jsonl (default) or junit
+  -o, --output PATH         Write directory mode output to a file instead of stdout
+  -w, --workers N           Worker processes for directory mode (default: CPU count)
   --id ID                   ID of the workflow
 
+Directory mode exits with status 1 when any workflow has issues or cannot be read.
+
 Examples:
-  python -m src.cli validate --id 123456
-  python -m src.cli validate --file ./workflows/workflow.json
-  python -m src.cli import --file ./workflows/workflow.json
+  python -m n8n_mcp.cli validate --id 123456
+  python -m n8n_mcp.cli validate --file ./workflows/workflow.json
+  python -m n8n_mcp.cli validate --dir ./workflows --format junit -o report.xml
+  python -m n8n_mcp.cli import --file ./workflows/workflow.json
+  python -m n8n_mcp.cli import --dir ./workflows --checkpoint import.json --rate 10
     """)
 
+def validate_file(file_path: str, validator_options: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate one workflow file; processed files are unwrapped to their originalWorkflow."""
+    workflow_data = read_json_file(file_path)
+    workflow = workflow_data.get("originalWorkflow", workflow_data)
+    return validate_workflow(workflow, validator_options)
+
+def _validate_files(file_paths: List[str], validator_options: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Worker task for directory mode: one record per file, errors included."""
+    records = []
+    for file_path in file_paths:
+        try:
+            records.append({"file": file_path, **validate_file(file_path, validator_options)})
+        except Exception as e:
+            records.append({"file": file_path, "error": str(e)})
+    return records
+
+def iter_directory_results(
+    file_paths: List[str],
+    validator_options: Dict[str, Any],
+    workers: int = 1,
+    chunk_size: int = VALIDATION_CHUNK_SIZE,
+) -> Iterator[Dict[str, Any]]:
+    """Yield a validation record per file, in file order.
+
+    With more than one worker, files are validated in a process pool in
+    chunks of chunk_size. At most two chunks per worker are in flight, so
+    memory stays bounded however many files there are.
+    """
+    paths = iter(file_paths)
+    chunks = iter(lambda: list(islice(paths, chunk_size)), [])
+    if workers <= 1:
+        for chunk in chunks:
+            yield from _validate_files(chunk, validator_options)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        in_flight = deque()
+        for chunk in chunks:
+            in_flight.append(executor.submit(_validate_files, chunk, validator_options))
+            if len(in_flight) >= workers * 2:
+                yield from in_flight.popleft().result()
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+class JsonlReporter:
+    def __init__(self, out: TextIO, total: int):
+        self.out = out
+
+    def write(self, record: Dict[str, Any]):
+        self.out.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+    def close(self):
+        self.out.flush()
+
+class JunitReporter:
+    """Streams one <testcase> per workflow file, with a <failure> listing its issues."""
+
+    def __init__(self, out: TextIO, total: int):
+        self.out = out
+        out.write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        out.write(f'<testsuite name="n8n-workflow-validation" tests="{total}">\n')
+
+    def write(self, record: Dict[str, Any]):
+        attributes = f'classname="n8n-workflows" name={quoteattr(record["file"])}'
+        if "error" in record:
+            self.out.write(
+                f'  <testcase {attributes}><error message={quoteattr(record["error"])}/></testcase>\n'
+            )
+        elif record["passed"]:
+            self.out.write(f'  <testcase {attributes}/>\n')
+        else:
+            lines = [
+                f"{category}: {issue}"
+                for category, result in record["results"].items() for issue in result["issues"]
+            ]
+            message = quoteattr(f"{record['totalIssues']} issues")
+            self.out.write(
+                f'  <testcase {attributes}><failure message={message}>'
+                f'{escape(chr(10).join(lines))}</failure></testcase>\n'
+            )
+
+    def close(self):
+        self.out.write("</testsuite>\n")
+        self.out.flush()
+
+REPORTERS = {"jsonl": JsonlReporter, "junit": JunitReporter}
+
+def validate_directory(directory: str, options: argparse.Namespace) -> int:
+    """Validate every *.json file under directory and stream the report; returns the exit status."""
+    file_paths = sorted(str(path) for path in Path(directory).rglob("*.json") if path.is_file())
+    workers = options.workers or int(os.getenv("VALIDATION_WORKERS", "0")) or os.cpu_count() or 1
+    validator_options = {"validators": options.validators, "strictness": options.strictness}
+
+    out = open(options.output, "w", encoding="utf-8") if options.output else sys.stdout
+    reporter = REPORTERS[options.format](out, len(file_paths))
+    failed = errors = 0
+    try:
+        for record in iter_directory_results(file_paths, validator_options, workers):
+            if "error" in record:
+                errors += 1
+            elif not record["passed"]:
+                failed += 1
+            reporter.write(record)
+        reporter.close()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    print(
+        f"Validated {len(file_paths)} workflow files: {len(file_paths) - failed - errors} passed, "
+        f"{failed} with issues, {errors} unreadable.",
+        file=sys.stderr,
+    )
+    return 1 if failed or errors else 0
+
 def validate_local_workflow(file_path: str, options: argparse.Namespace):
     try:
         print(f"Validating workflow file: {file_path}")
         
-        with open(file_path, 'r') as f:
-            workflow_data = json.load(f)
-            
-        workflow = workflow_data.get("originalWorkflow", workflow_data)
-        
-        validation_results = validate_workflow(workflow, {
+        validation_results = validate_file(file_path, {
             "validators": options.validators,
             "strictness": options.strictness
         })
@@ -80,6 +217,25 @@ def import_workflow(file_path: str):
         print("Workflow imported successfully!")
         print(f"Workflow ID: {created_workflow.get('id')}")
 
+def bulk_import(path: str, options: argparse.Namespace) -> int:
+    print(f"Importing workflows from: {path}", file=sys.stderr)
+    stats = import_workflows(
+        N8nApiClient(), path,
+        checkpoint_path=options.checkpoint,
+        concurrency=options.concurrency,
+        rate=options.rate,
+        match_existing=options.match_existing,
+    )
+    print(
+        f"Imported {stats['created']} new and {stats['updated']} updated workflows; "
+        f"{stats['skipped']} unchanged, {stats['duplicates']} duplicates, {stats['failed']} failed "
+        f"in {stats['seconds']}s.",
+        file=sys.stderr,
+    )
+    for error in stats["errors"]:
+        print(f"  - {error}", file=sys.stderr)
+    return 1 if stats["failed"] else 0
+
 def main():
     parser = argparse.ArgumentParser(description="n8n Workflow CLI", add_help=False)
     parser.add_argument("command", nargs="?", help="Command to execute (validate, import)")
@@ -87,6 +243,15 @@ def main():
     parser.add_argument("-s", "--strictness", default="medium", choices=["low", "medium", "high"], help="Validation strictness level")
     parser.add_argument("-v", "--validators", type=lambda s: s.split(','), default=['naming', 'errorHandling', 'security', 'performance', 'documentation'], help="Comma-separated list of validators")
     parser.add_argument("-f", "--file", help="Path to a local workflow file")
+    parser.add_argument("-d", "--dir", help="Directory of workflow files to validate")
+    parser.add_argument("--format", default="jsonl", choices=sorted(REPORTERS), help="Directory mode output format")
+    parser.add_argument("-o", "--output", help="Directory mode output file (default: stdout)")
+    parser.add_argument("-w", "--workers", type=int, help="Worker processes for directory mode")
+    parser.add_argument("--jsonl", help="JSONL file of workflows to import")
+    parser.add_argument("--checkpoint", help="Bulk import checkpoint file")
+    parser.add_argument("--rate", type=float, help="Bulk import requests per second")
+    parser.add_argument("--concurrency", type=int, help="Concurrent bulk import requests")
+    parser.add_argument("--match-existing", action="store_true", help="Update workflows with the same name")
     parser.add_argument("--id", help="ID of the workflow")
     
     args = parser.parse_args()
@@ -96,18 +261,22 @@ def main():
         return
         
     if args.command == "validate":
-        if args.file:
+        if args.dir:
+            sys.exit(validate_directory(args.dir, args))
+        elif args.file:
             validate_local_workflow(args.file, args)
         elif args.id:
             # The original script for validating n8n workflow is not fully implemented in Python yet.
             print("Validating from n8n by ID is not yet supported in this version.")
         else:
-            print("Please provide a file path or an ID to validate.")
+            print("Please provide a file path, a directory or an ID to validate.", file=sys.stderr)
     elif args.command == "import":
-        if args.file:
+        if args.dir or args.jsonl:
+            sys.exit(bulk_import(args.dir or args.jsonl, args))
+        elif args.file:
             import_workflow(args.file)
         else:
-            print("Please provide a file path to import.")
+            print("Please provide a file path, a directory or a JSONL file to import.", file=sys.stderr)
 
 if __name__ == "__main__":
     main()
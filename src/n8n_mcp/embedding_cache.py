@@ -0,0 +1,128 @@
+import os
+import hashlib
+import sqlite3
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+# Part of every key; bumped when the vectors the client produces change, so older
+# cache files are not mixed in (2: queries moved to /api/embed like documents)
+KEY_VERSION = 2
+
+class EmbeddingCache:
+    """Two-tier embedding cache keyed by (model, normalized text hash).
+
+    The first tier is an in-memory LRU bounded to max_entries. When a path is
+    given, a SQLite file acts as a second tier that survives restarts; it is
+    trimmed to max_disk_entries, oldest entries first. Vectors are stored on
+    disk as float32 blobs.
+    """
+
+    def __init__(self, max_entries: int = 10000, path: Optional[str] = None, max_disk_entries: int = 200000):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.path = path
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL;")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, model TEXT, vector BLOB)"
+            )
+            self._db.commit()
+
+    @classmethod
+    def from_env(cls) -> Optional["EmbeddingCache"]:
+        """Build the cache from EMBEDDING_CACHE_* settings; None when disabled."""
+        max_entries = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+        path = os.getenv("EMBEDDING_CACHE_PATH") or None
+        if max_entries <= 0 and not path:
+            return None
+        return cls(max_entries, path, int(os.getenv("EMBEDDING_CACHE_DISK_MAX", "200000")))
+
+    @staticmethod
+    def key(model: str, text: str) -> str:
+        normalized = " ".join(unicodedata.normalize("NFC", text).split())
+        return hashlib.sha256(f"{KEY_VERSION}\n{model}\n{normalized}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, embedding: List[float]):
+        if self.max_entries <= 0:
+            return
+        self._memory[key] = embedding
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get_many(self, model: str, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        keys = [self.key(model, text) for text in texts]
+        results: List[Optional[List[float]]] = [None] * len(keys)
+        missing: Dict[str, List[int]] = {}
+        with self._lock:
+            for i, key in enumerate(keys):
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    results[i] = self._memory[key]
+                    self.hits += 1
+                else:
+                    missing.setdefault(key, []).append(i)
+
+            if missing and self._db is not None:
+                found = {}
+                pending = list(missing)
+                for start in range(0, len(pending), 500):
+                    chunk = pending[start:start + 500]
+                    rows = self._db.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                    ).fetchall()
+                    found.update(rows)
+                for key, blob in found.items():
+                    embedding = array("f", blob).tolist()
+                    self._remember(key, embedding)
+                    for i in missing.pop(key):
+                        results[i] = embedding
+                        self.hits += 1
+                        self.disk_hits += 1
+
+            self.misses += sum(len(positions) for positions in missing.values())
+        return results
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        return self.get_many(model, [text])[0]
+
+    def put_many(self, model: str, texts: Sequence[str], embeddings: Sequence[Optional[List[float]]]):
+        entries = [(self.key(model, text), embedding) for text, embedding in zip(texts, embeddings) if embedding]
+        if not entries:
+            return
+        with self._lock:
+            for key, embedding in entries:
+                self._remember(key, embedding)
+            if self._db is not None:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, model, vector) VALUES (?, ?, ?)",
+                    [(key, model, array("f", embedding).tobytes()) for key, embedding in entries],
+                )
+                self._db.execute(
+                    "DELETE FROM embeddings WHERE rowid <= (SELECT max(rowid) FROM embeddings) - ?",
+                    (self.max_disk_entries,),
+                )
+                self._db.commit()
+
+    def put(self, model: str, text: str, embedding: Optional[List[float]]):
+        self.put_many(model, [text], [embedding])
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "diskHits": self.disk_hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "memoryEntries": len(self._memory),
+        }
@@ -1,35 +1,174 @@
+import os
+import logging
+import time
+import hashlib
+import threading
 import requests
 import json
-import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+from dotenv import load_dotenv
+from n8n_mcp.embedding_cache import EmbeddingCache
+from n8n_mcp.metrics import metrics
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
 
 class EmbeddingClient:
-    def __init__(self, host="http://192.168.0.100:11434", model_name="qwen3-embedding-0.6b"):
-        self.host = host
-        self.model_name = model_name
-        self.base_url = f"{self.host}/api/embeddings"
+    def __init__(self, host=None, model_name=None,
+                 batch_size=None, max_in_flight=None, max_retries=3, timeout=60, cache="env", chunk_tokens=None):
+        self.host = host or os.getenv("EMBEDDING_MODEL_HOST", "http://192.168.0.100:11434")
+        self.model_name = model_name or os.getenv("EMBEDDING_MODEL_NAME", "qwen3-embedding-0.6b")
+        # Queries and documents both use /api/embed, so they get the same L2-normalized vectors
+        self.batch_url = f"{self.host}/api/embed"
+        self.batch_size = batch_size or int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+        self.max_in_flight = max_in_flight or int(os.getenv("EMBEDDING_MAX_IN_FLIGHT", "4"))
+        # Longest text embedded as one vector, in approximate tokens; longer descriptions are chunked
+        self.chunk_tokens = chunk_tokens or int(os.getenv("EMBEDDING_CHUNK_TOKENS", "256"))
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self._local = threading.local()
+        self.cache = EmbeddingCache.from_env() if cache == "env" else cache
+
+    @property
+    def session(self) -> requests.Session:
+        """Per-thread HTTP session so batches in flight reuse their connections."""
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def content_hash(self, text: str) -> str:
+        """Hash of the text together with the model name, used to skip re-embedding."""
+        return hashlib.sha256(f"{self.model_name}\n{text}".encode("utf-8")).hexdigest()
 
     def get_embedding(self, text: str):
+        if self.cache is not None:
+            cached = self.cache.get(self.model_name, text)
+            if cached is not None:
+                return cached
         try:
-            response = requests.post(
-                self.base_url,
+            embedding = self._embed([text], "embed_one")[0]
+            if self.cache is not None:
+                self.cache.put(self.model_name, text, embedding)
+            return embedding
+        except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+            print(f"Error getting embedding: {e}")
+            return None
+
+    def get_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Embed a batch of texts with a single request to the /api/embed endpoint.
+
+        Raises on transport errors or when the response does not contain one
+        embedding per input, so the caller can decide how to retry.
+        """
+        return self._embed(texts, "embed_batch")
+
+    def _embed(self, texts: List[str], operation: str) -> List[List[float]]:
+        with metrics.time_backend("embedding", operation):
+            response = self.session.post(
+                self.batch_url,
                 data=json.dumps({
                     "model": self.model_name,
-                    "prompt": text
-                })
+                    "input": texts
+                }),
+                timeout=self.timeout,
             )
             response.raise_for_status()
-            return response.json()["embedding"]
-        except requests.exceptions.RequestException as e:
-            print(f"Error getting embedding: {e}")
-            return None
+            embeddings = response.json().get("embeddings") or []
+            if len(embeddings) != len(texts):
+                raise ValueError(f"Expected {len(texts)} embeddings, got {len(embeddings)}")
+        return embeddings
+
+    def _embed_with_retry(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """Embed one batch, retrying only the items that failed.
+
+        Each retry halves the size of the sub-batches the pending items are
+        sent in, so a single bad input ends up isolated instead of failing
+        the rest of its batch.
+        """
+        results: List[Optional[List[float]]] = [None] * len(texts)
+        pending = list(range(len(texts)))
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                time.sleep(min(0.25 * 2 ** (attempt - 1), 8))
+            group_size = max(1, len(pending) >> attempt)
+            failed = []
+            for start in range(0, len(pending), group_size):
+                group = pending[start:start + group_size]
+                try:
+                    embeddings = self.get_embeddings([texts[i] for i in group])
+                except (requests.exceptions.RequestException, ValueError, KeyError) as e:
+                    logger.warning("Error embedding batch of %d (attempt %d): %s", len(group), attempt + 1, e)
+                    failed.extend(group)
+                    continue
+                for i, embedding in zip(group, embeddings):
+                    if embedding:
+                        results[i] = embedding
+                    else:
+                        failed.append(i)
+            pending = failed
+            if not pending:
+                break
+        return results
+
+    def embed_all(self, texts: List[str],
+                  on_progress: Optional[Callable[[int, int], None]] = None):
+        """Embed many texts in batches, keeping up to max_in_flight batches running.
+
+        Texts already in the embedding cache are not sent. Returns the
+        embeddings in input order (None for items that failed after all
+        retries) and a stats dict with counts and throughput. on_progress(done,
+        total) is called after each batch; an exception it raises cancels the
+        batches not yet sent and propagates.
+        """
+        start = time.perf_counter()
+        embeddings: List[Optional[List[float]]] = (
+            self.cache.get_many(self.model_name, texts) if self.cache is not None else [None] * len(texts)
+        )
+        misses = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        cache_hits = len(texts) - len(misses)
+        batches = [misses[i:i + self.batch_size] for i in range(0, len(misses), self.batch_size)]
+        done = cache_hits
+        if on_progress and cache_hits:
+            on_progress(done, len(texts))
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            results = executor.map(self._embed_with_retry, ([texts[i] for i in batch] for batch in batches))
+            try:
+                for batch, batch_result in zip(batches, results):
+                    for i, embedding in zip(batch, batch_result):
+                        embeddings[i] = embedding
+                    if self.cache is not None:
+                        self.cache.put_many(self.model_name, [texts[i] for i in batch], batch_result)
+                    done += len(batch)
+                    if on_progress:
+                        on_progress(done, len(texts))
+            finally:
+                # If on_progress raised, cancel the batches that have not been sent yet
+                results.close()
+
+        elapsed = time.perf_counter() - start
+        failed = sum(1 for embedding in embeddings if embedding is None)
+        stats = {
+            "total": len(texts),
+            "embedded": len(texts) - failed,
+            "failed": failed,
+            "cacheHits": cache_hits,
+            "batches": len(batches),
+            "seconds": round(elapsed, 3),
+            "itemsPerSecond": round(len(texts) / elapsed, 2) if elapsed > 0 else None,
+        }
+        return embeddings, stats
 
     def cosine_similarity(self, v1, v2):
+        import numpy as np
         return np.dot(v1, v2) / (np.linalg.norm(v1) * np.linalg.norm(v2))
 
     def search_similar(self, query_embedding, embeddings, top_k=5):
-        similarities = [
-            (i, self.cosine_similarity(query_embedding, emb))
-            for i, emb in enumerate(embeddings)
-        ]
-        similarities.sort(key=lambda x: x[1], reverse=True)
-        return similarities[:top_k]
+        """Return (position, cosine similarity) for the top_k closest embeddings."""
+        from n8n_mcp.vector_index import VectorIndex
+        index = VectorIndex()
+        index.add(list(range(len(embeddings))), embeddings)
+        return index.search(query_embedding, top_k)
@@ -0,0 +1,273 @@
+import os
+import logging
+import json
+import time
+import uuid
+import asyncio
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional
+from n8n_mcp.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Jobs that have stopped for good; anything else is queued or running
+FINISHED_STATUSES = ("succeeded", "failed", "cancelled", "interrupted")
+# Minimum seconds between writes of a running job's progress to its state file
+PERSIST_INTERVAL = 2.0
+
+class JobCancelled(BaseException):
+    """Raised from Job.progress() and Job.check() once the job has been cancelled.
+
+    Like asyncio.CancelledError it is not an Exception, so the broad error
+    handlers of the clients and the parser let it through.
+    """
+
+class Job:
+    """A long-running tool call executed in the background.
+
+    The job function reports progress through progress(), which may be
+    called from any thread, and stops when progress() or check() raises
+    JobCancelled. Cancellation is cooperative: a running job keeps its
+    status until it reaches the next of those calls.
+    """
+
+    def __init__(self, kind: str, arguments: Optional[Dict[str, Any]] = None, job_id: Optional[str] = None):
+        self.id = job_id or uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.arguments = arguments or {}
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.phase: Optional[str] = None
+        self.done = 0
+        self.total: Optional[int] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.on_change: Optional[Callable[["Job"], None]] = None
+        self._cancel_requested = threading.Event()
+        self._phase_started: Optional[float] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancel_requested.is_set()
+
+    def cancel(self):
+        self._cancel_requested.set()
+
+    def check(self):
+        if self._cancel_requested.is_set():
+            raise JobCancelled(f"Job {self.id} was cancelled")
+
+    def start_phase(self, phase: str, total: Optional[int] = None):
+        """Begin a new step of the job; progress and the rate restart from zero."""
+        self.check()
+        self.phase = phase
+        self.done = 0
+        self.total = total
+        self._phase_started = time.time()
+        self._changed()
+
+    def progress(self, done: int, total: Optional[int] = None):
+        """Record items done in the current phase, e.g. as an on_progress callback."""
+        self.done = done
+        if total is not None:
+            self.total = total
+        self._changed()
+        self.check()
+
+    def _changed(self):
+        if self.on_change is not None:
+            self.on_change(self)
+
+    def rate(self) -> Optional[float]:
+        """Items per second in the current phase."""
+        if self._phase_started is None or not self.done:
+            return None
+        elapsed = (self.finished_at or time.time()) - self._phase_started
+        return self.done / elapsed if elapsed > 0 else None
+
+    def to_dict(self) -> Dict[str, Any]:
+        rate = self.rate()
+        eta = None
+        if rate and self.total is not None and not self.finished:
+            eta = round(max(0, self.total - self.done) / rate, 1)
+        data = {
+            "jobId": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "phase": self.phase,
+            "done": self.done,
+            "total": self.total,
+            "itemsPerSecond": round(rate, 2) if rate else None,
+            "etaSeconds": eta,
+            "cancelRequested": self.cancel_requested,
+            "createdAt": self.created_at,
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at,
+        }
+        if self.error:
+            data["error"] = self.error
+        if self.finished and self.result is not None:
+            data["result"] = self.result
+        return data
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Job":
+        job = cls(data["kind"], job_id=data["jobId"])
+        job.status = data["status"]
+        job.phase = data.get("phase")
+        job.done = data.get("done") or 0
+        job.total = data.get("total")
+        job.created_at = data.get("createdAt") or job.created_at
+        job.started_at = data.get("startedAt")
+        job.finished_at = data.get("finishedAt")
+        job.result = data.get("result")
+        job.error = data.get("error")
+        return job
+
+class JobManager:
+    """Runs jobs on the event loop, at most max_running at a time.
+
+    Jobs are kept in memory, the newest max_jobs of them. With a state
+    directory (JOB_STATE_DIR), every job is also written to
+    <dir>/<job id>.json, so job_status still answers after the server
+    restarts. Jobs that were queued or running when the previous process
+    exited are loaded as "interrupted".
+    """
+
+    def __init__(self, max_running: Optional[int] = None, state_dir: Optional[str] = None, max_jobs: int = 100):
+        self.max_running = max_running or int(os.getenv("JOB_WORKERS", "1"))
+        state_dir = state_dir or os.getenv("JOB_STATE_DIR")
+        self.state_dir = Path(state_dir) if state_dir else None
+        self.max_jobs = max_jobs
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop = None
+        self._persisted_at: Dict[str, float] = {}
+        if self.state_dir is not None:
+            self.state_dir.mkdir(parents=True, exist_ok=True)
+            self._load()
+
+    def _load(self):
+        loaded = []
+        for path in self.state_dir.glob("*.json"):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    job = Job.from_dict(json.load(f))
+            except (OSError, ValueError, KeyError) as e:
+                logger.error("Error loading job state %s: %s", path, e)
+                continue
+            if not job.finished:
+                job.status = "interrupted"
+                job.error = "The server stopped before the job finished; run the tool again to resume."
+                self._save(job)
+            loaded.append(job)
+        for job in sorted(loaded, key=lambda job: job.created_at)[-self.max_jobs:]:
+            self.jobs[job.id] = job
+
+    def _save(self, job: Job):
+        if self.state_dir is None:
+            return
+        path = self.state_dir / f"{job.id}.json"
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(job.to_dict(), f)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.error("Error saving job state %s: %s", path, e)
+
+    def _on_change(self, job: Job):
+        # Called from worker threads; throttled so progress does not turn into a file write per item
+        now = time.monotonic()
+        if now - self._persisted_at.get(job.id, 0.0) >= PERSIST_INTERVAL:
+            self._persisted_at[job.id] = now
+            self._save(job)
+
+    def _prune(self):
+        while len(self.jobs) > self.max_jobs:
+            oldest = next((job for job in self.jobs.values() if job.finished), None)
+            if oldest is None:
+                break
+            del self.jobs[oldest.id]
+            self._persisted_at.pop(oldest.id, None)
+            if self.state_dir is not None:
+                (self.state_dir / f"{oldest.id}.json").unlink(missing_ok=True)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def active(self, kind: str) -> Optional[Job]:
+        """The queued or running job of this kind, if there is one."""
+        return next((job for job in self.jobs.values() if job.kind == kind and not job.finished), None)
+
+    async def wait(self, job: Job, timeout: float):
+        """Wait up to timeout seconds for job to finish."""
+        task = self._tasks.get(job.id)
+        if task is not None and timeout > 0:
+            await asyncio.wait({task}, timeout=timeout)
+
+    def submit(self, kind: str, arguments: Dict[str, Any], run: Callable[[Job], Awaitable[Any]]) -> Job:
+        """Queue run(job) on the running event loop and return the job immediately."""
+        job = Job(kind, arguments)
+        job.on_change = self._on_change
+        self.jobs[job.id] = job
+        self._prune()
+        self._save(job)
+        self._tasks[job.id] = asyncio.get_running_loop().create_task(self._run(job, run))
+        return job
+
+    async def _run(self, job: Job, run: Callable[[Job], Awaitable[Any]]):
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            # asyncio primitives belong to one loop; a new one gets fresh slots
+            self._slots, self._slots_loop = asyncio.Semaphore(self.max_running), loop
+        try:
+            async with self._slots:
+                if job.cancel_requested:
+                    job.status = "cancelled"
+                    return
+                job.status = "running"
+                job.started_at = time.time()
+                self._save(job)
+                try:
+                    job.result = await run(job)
+                    job.status = "succeeded"
+                except JobCancelled:
+                    job.status = "cancelled"
+                except Exception as e:
+                    job.status = "failed"
+                    job.error = str(e)
+                    logger.exception("Job %s (%s) failed: %s", job.id, job.kind, e)
+                metrics.observe_backend("job", job.kind, time.time() - job.started_at, error=job.status == "failed")
+        finally:
+            job.finished_at = time.time()
+            self._save(job)
+            self._tasks.pop(job.id, None)
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        job = self.jobs.get(job_id)
+        if job is not None and not job.finished:
+            job.cancel()
+            if job.status == "queued":
+                # Never started, so there is no checkpoint to wait for
+                job.status = "cancelled"
+                job.finished_at = time.time()
+            self._save(job)
+        return job
+
+    async def shutdown(self):
+        """Cancel every unfinished job and wait for them to stop at their next checkpoint."""
+        for job in self.jobs.values():
+            if not job.finished:
+                job.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
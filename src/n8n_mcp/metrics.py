@@ -0,0 +1,214 @@
+import os
+import logging
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds of the latency histogram buckets; the last bucket is +Inf
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def escape_label(value: Any) -> str:
+    """A Prometheus label value with backslash, double quote and newline escaped."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class Histogram:
+    """Fixed-bucket latency histogram with count, sum and max."""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (max for the +Inf bucket)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return round(min(bound, self.max), 6)
+        return round(self.max, 6)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "meanSeconds": round(self.total / self.count, 6) if self.count else 0.0,
+            "p50Seconds": self.quantile(0.5),
+            "p95Seconds": self.quantile(0.95),
+            "p99Seconds": self.quantile(0.99),
+            "maxSeconds": round(self.max, 6),
+        }
+
+class MetricsRegistry:
+    """Process-wide latency, call, error and cache metrics.
+
+    Tool calls are recorded per tool name and backend calls per
+    (backend, operation), each as a latency histogram plus an error count.
+    Caches register a stats() callable, which is read when a snapshot is
+    taken. snapshot() returns JSON-ready data and prometheus_text() renders
+    the same data in the Prometheus text exposition format.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.tools: Dict[str, Histogram] = {}
+        self.tool_errors: Dict[str, int] = {}
+        self.backends: Dict[Tuple[str, str], Histogram] = {}
+        self.backend_errors: Dict[Tuple[str, str], int] = {}
+        self.caches: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+    def observe_tool(self, name: str, seconds: float, error: bool = False):
+        with self._lock:
+            self.tools.setdefault(name, Histogram()).observe(seconds)
+            if error:
+                self.tool_errors[name] = self.tool_errors.get(name, 0) + 1
+
+    def observe_backend(self, backend: str, operation: str, seconds: float, error: bool = False):
+        key = (backend, operation)
+        with self._lock:
+            self.backends.setdefault(key, Histogram()).observe(seconds)
+            if error:
+                self.backend_errors[key] = self.backend_errors.get(key, 0) + 1
+
+    @contextmanager
+    def time_backend(self, backend: str, operation: str):
+        """Record the duration of the with-block; an exception counts as an error and propagates."""
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.observe_backend(backend, operation, time.perf_counter() - started, error=True)
+            raise
+        self.observe_backend(backend, operation, time.perf_counter() - started)
+
+    def register_cache(self, name: str, stats: Callable[[], Dict[str, Any]]):
+        self.caches[name] = stats
+
+    def reset(self):
+        with self._lock:
+            self.tools.clear()
+            self.tool_errors.clear()
+            self.backends.clear()
+            self.backend_errors.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            tools = {
+                name: {**histogram.summary(), "errors": self.tool_errors.get(name, 0)}
+                for name, histogram in sorted(self.tools.items())
+            }
+            backends: Dict[str, Dict[str, Any]] = {}
+            for (backend, operation), histogram in sorted(self.backends.items()):
+                backends.setdefault(backend, {})[operation] = {
+                    **histogram.summary(), "errors": self.backend_errors.get((backend, operation), 0)
+                }
+        caches = {}
+        for name, stats in self.caches.items():
+            try:
+                caches[name] = stats()
+            except Exception as e:
+                caches[name] = {"error": str(e)}
+        return {
+            "uptimeSeconds": round(time.time() - self.started, 3),
+            "tools": tools,
+            "backends": backends,
+            "caches": caches,
+        }
+
+    @staticmethod
+    def _histogram_lines(metric: str, labels: str, histogram: Histogram) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            cumulative += count
+            lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+        lines.append(f"{metric}_sum{{{labels}}} {histogram.total}")
+        lines.append(f"{metric}_count{{{labels}}} {histogram.count}")
+        return lines
+
+    def prometheus_text(self) -> str:
+        lines = [
+            "# HELP n8n_mcp_tool_duration_seconds MCP tool call latency.",
+            "# TYPE n8n_mcp_tool_duration_seconds histogram",
+        ]
+        with self._lock:
+            for name, histogram in sorted(self.tools.items()):
+                lines += self._histogram_lines(
+                    "n8n_mcp_tool_duration_seconds", f'tool="{escape_label(name)}"', histogram
+                )
+            lines += [
+                "# HELP n8n_mcp_tool_errors_total MCP tool calls that failed.",
+                "# TYPE n8n_mcp_tool_errors_total counter",
+            ]
+            lines += [f'n8n_mcp_tool_errors_total{{tool="{escape_label(name)}"}} {count}'
+                      for name, count in sorted(self.tool_errors.items())]
+            lines += [
+                "# HELP n8n_mcp_backend_duration_seconds Latency of calls to n8n, the embedding service and PostgreSQL.",
+                "# TYPE n8n_mcp_backend_duration_seconds histogram",
+            ]
+            for (backend, operation), histogram in sorted(self.backends.items()):
+                labels = f'backend="{escape_label(backend)}",operation="{escape_label(operation)}"'
+                lines += self._histogram_lines("n8n_mcp_backend_duration_seconds", labels, histogram)
+            lines += [
+                "# HELP n8n_mcp_backend_errors_total Backend calls that failed.",
+                "# TYPE n8n_mcp_backend_errors_total counter",
+            ]
+            lines += [f'n8n_mcp_backend_errors_total{{backend="{escape_label(backend)}",'
+                      f'operation="{escape_label(operation)}"}} {count}'
+                      for (backend, operation), count in sorted(self.backend_errors.items())]
+
+        lines += [
+            "# HELP n8n_mcp_cache_hit_ratio Fraction of cache lookups served from the cache.",
+            "# TYPE n8n_mcp_cache_hit_ratio gauge",
+        ]
+        for name, stats in self.snapshot()["caches"].items():
+            if "hitRate" in stats:
+                lines.append(f'n8n_mcp_cache_hit_ratio{{cache="{escape_label(name)}"}} {stats["hitRate"]}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus_file(self, path: str):
+        """Write prometheus_text() to path atomically, e.g. for node_exporter's textfile collector."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+
+class PrometheusFileWriter:
+    """Rewrites the Prometheus dump at most once per interval seconds when path is set."""
+
+    def __init__(self, registry: MetricsRegistry, path: Optional[str] = None, interval: Optional[float] = None):
+        self.registry = registry
+        self.path = path if path is not None else os.getenv("METRICS_PROMETHEUS_FILE") or None
+        self.interval = interval if interval is not None else float(os.getenv("METRICS_DUMP_INTERVAL", "15"))
+        self._written_at = 0.0
+
+    def maybe_write(self, force: bool = False):
+        if not self.path:
+            return
+        now = time.monotonic()
+        if not force and now - self._written_at < self.interval:
+            return
+        self._written_at = now
+        try:
+            self.registry.write_prometheus_file(self.path)
+        except OSError as e:
+            logger.error("Error writing metrics file %s: %s", self.path, e)
+
+# Shared by the clients and the server so every call lands in one registry
+metrics = MetricsRegistry()
@@ -1,68 +1,142 @@
 import os
+import time
+import random
 import requests
 from dotenv import load_dotenv
+from n8n_mcp.metrics import metrics
 
 load_dotenv()
 
+# Largest page the n8n public API returns for one listing request
+MAX_PAGE_SIZE = 250
+# Responses worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
 class N8nApiClient:
     def __init__(self):
         self.base_url = os.getenv("N8N_HOST", "http://localhost:5678")
+        # A missing key is reported when a request is made, so the server can start without one
         self.api_key = os.getenv("N8N_API_KEY")
-        if not self.api_key:
-            raise ValueError("N8N_API_KEY not found in .env file")
         self.headers = {
             "Accept": "application/json",
-            "X-N8N-API-KEY": self.api_key,
+            "X-N8N-API-KEY": self.api_key or "",
         }
+        self.max_retries = int(os.getenv("N8N_MAX_RETRIES", "3"))
+        self.retry_backoff = float(os.getenv("N8N_RETRY_BACKOFF", "0.5"))
 
-    def get_workflows(self):
-        workflows = []
-        cursor = None
+    def _retry_delay(self, attempt: int, response=None) -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        # Exponential backoff with jitter so concurrent callers do not retry in lockstep
+        return self.retry_backoff * (2 ** attempt) * (0.5 + random.random() / 2)
+
+    def request(self, method: str, path: str, **kwargs):
+        """Send an API request and return the decoded JSON body.
+
+        Connection errors and 429/5xx responses are retried up to
+        N8N_MAX_RETRIES times with exponential backoff, honouring
+        Retry-After. Raises requests.exceptions.RequestException once the
+        retries are exhausted or on any other error status, and ValueError
+        when N8N_API_KEY is not set.
+        """
+        if not self.api_key:
+            raise ValueError("N8N_API_KEY not found in .env file")
+        # e.g. "GET /workflows" or "PUT /workflows/{id}", so ids do not become metric labels
+        resource = path.strip("/").split("/")[2:]
+        operation = f"{method} /{resource[0]}" + ("/{id}" if len(resource) > 1 else "")
+        with metrics.time_backend("n8n", operation):
+            return self._request_with_retries(method, path, **kwargs)
+
+    def _request_with_retries(self, method: str, path: str, **kwargs):
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = requests.request(method, f"{self.base_url}{path}", headers=self.headers, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if attempt == self.max_retries:
+                    raise
+                time.sleep(self._retry_delay(attempt))
+                continue
+            if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                time.sleep(self._retry_delay(attempt, response))
+                continue
+            response.raise_for_status()
+            return response.json()
+
+    def iter_workflow_pages(self, page_size=None, cursor=None, raise_errors=False, **filters):
+        """Yield (workflows, next_cursor) for each page of the workflow listing.
+
+        Pages are fetched lazily, so a caller that stops iterating stops
+        fetching. filters are passed through as n8n query parameters (active,
+        tags, name, projectId); None values are ignored. A failed request
+        ends the listing early, or raises with raise_errors for callers that
+        must not mistake a partial listing for a complete one.
+        """
         while True:
-            params = {}
+            params = {"excludePinnedData": "true"}
+            params.update({key: value for key, value in filters.items() if value is not None})
+            if page_size:
+                params["limit"] = page_size
             if cursor:
                 params["cursor"] = cursor
             
             try:
-                response = requests.get(f"{self.base_url}/api/v1/workflows", headers=self.headers, params=params)
-                response.raise_for_status()
-                data = response.json()
-                
-                if "data" in data and data["data"]:
-                    workflows.extend(data["data"])
-                
-                cursor = data.get("nextCursor")
-                if not cursor:
-                    break
+                data = self.request("GET", "/api/v1/workflows", params=params)
             except requests.exceptions.RequestException as e:
+                if raise_errors:
+                    raise
                 print(f"Error fetching workflows: {e}")
+                return
+                
+            cursor = data.get("nextCursor")
+            yield data.get("data") or [], cursor
+            if not cursor:
+                return
+
+    def list_workflows_page(self, limit=50, cursor=None, **filters):
+        """Fetch at most limit workflows starting at cursor.
+
+        Each request asks n8n for exactly the number of workflows still
+        missing, so the returned nextCursor resumes right after the last
+        workflow returned. Raises when a request fails after its retries,
+        so an outage is not mistaken for the end of the list.
+        """
+        workflows = []
+        while len(workflows) < limit:
+            page_size = min(limit - len(workflows), MAX_PAGE_SIZE)
+            page, cursor = next(self.iter_workflow_pages(page_size, cursor, raise_errors=True, **filters), ([], None))
+            workflows.extend(page)
+            if not page or not cursor:
                 break
-        
+        return {"data": workflows, "nextCursor": cursor}
+
+    def get_workflows(self):
+        """Fetch every workflow; raises if any page fails rather than returning a partial list."""
+        workflows = []
+        for page, _ in self.iter_workflow_pages(page_size=MAX_PAGE_SIZE, raise_errors=True):
+            workflows.extend(page)
         return workflows
 
     def create_workflow(self, workflow_data):
         try:
-            response = requests.post(f"{self.base_url}/api/v1/workflows", headers=self.headers, json=workflow_data)
-            response.raise_for_status()
-            return response.json()
+            return self.request("POST", "/api/v1/workflows", json=workflow_data)
         except requests.exceptions.RequestException as e:
             print(f"Error creating workflow: {e}")
             return None
 
     def get_workflow(self, workflow_id: str):
         try:
-            response = requests.get(f"{self.base_url}/api/v1/workflows/{workflow_id}", headers=self.headers)
-            response.raise_for_status()
-            return response.json()
+            return self.request("GET", f"/api/v1/workflows/{workflow_id}")
         except requests.exceptions.RequestException as e:
             print(f"Error fetching workflow {workflow_id}: {e}")
             return None
 
     def update_workflow(self, workflow_id: str, workflow_data: dict):
         try:
-            response = requests.put(f"{self.base_url}/api/v1/workflows/{workflow_id}", headers=self.headers, json=workflow_data)
-            response.raise_for_status()
-            return response.json()
+            return self.request("PUT", f"/api/v1/workflows/{workflow_id}", json=workflow_data)
         except requests.exceptions.RequestException as e:
             print(f"Error updating workflow {workflow_id}: {e}")
             return None
@@ -1,54 +1,350 @@
 import os
+import logging
+import io
+import csv
+import re
 import json
-import psycopg2
+import time
+import hashlib
+import threading
+from contextlib import contextmanager
 from dotenv import load_dotenv
+from n8n_mcp.metrics import metrics
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+WORKFLOW_COLUMNS = (
+    "id", "original_filename", "category", "name", "description", "tags", "complexity", "original_workflow",
+    "source", "version_id", "updated_at",
+)
+
+# Rows stored from files and from n8n can share ids; a row is only updated by its own source
+WORKFLOW_UPSERT = """
+ON CONFLICT (id) DO UPDATE SET
+    original_filename = EXCLUDED.original_filename,
+    category = EXCLUDED.category,
+    name = EXCLUDED.name,
+    description = EXCLUDED.description,
+    tags = EXCLUDED.tags,
+    complexity = EXCLUDED.complexity,
+    original_workflow = EXCLUDED.original_workflow,
+    version_id = EXCLUDED.version_id,
+    updated_at = EXCLUDED.updated_at
+WHERE workflows.source = EXCLUDED.source
+  AND (workflows.original_filename, workflows.category, workflows.name, workflows.description,
+       workflows.tags, workflows.complexity, workflows.original_workflow)
+   IS DISTINCT FROM
+      (EXCLUDED.original_filename, EXCLUDED.category, EXCLUDED.name, EXCLUDED.description,
+       EXCLUDED.tags, EXCLUDED.complexity, EXCLUDED.original_workflow)
+"""
+
+# Columns added after the first release, created on existing tables by create_workflows_table()
+WORKFLOW_ADDED_COLUMNS = (
+    "source TEXT NOT NULL DEFAULT 'file'",
+    "version_id TEXT",
+    "updated_at TIMESTAMP WITH TIME ZONE",
+)
+
+# ANN index of the single-model layout, which indexed a vector(384) column
+LEGACY_VECTOR_INDEX_NAME = "workflow_embeddings_embedding_idx"
+
+# Distance metric -> (pgvector operator, operator class used by the index)
+VECTOR_METRICS = {
+    "cosine": ("<=>", "vector_cosine_ops"),
+    "l2": ("<->", "vector_l2_ops"),
+    "ip": ("<#>", "vector_ip_ops"),
+}
+
+# Quantization -> (expression the ANN index is built on, oldest pgvector that supports it).
+# Embeddings are always stored at full precision: quantized indexes shortlist
+# candidates, which are then re-ranked exactly.
+VECTOR_QUANTIZATIONS = {
+    "none": ("{value}::vector({dimensions})", (0, 5, 0)),
+    "halfvec": ("{value}::halfvec({dimensions})", (0, 7, 0)),
+    "binary": ("binary_quantize({value})::bit({dimensions})", (0, 7, 0)),
+}
+# Binary-quantized vectors are compared by Hamming distance
+BINARY_OPERATOR = "<~>"
+BINARY_OPCLASS = "bit_hamming_ops"
+# A quantized search shortlists this many times the candidates before re-ranking
+RERANK_FACTOR = 4
+# Aggregates combining a workflow's chunk similarities into its score: best chunk, or all matching chunks
+CHUNK_POOLING = ("max", "sum")
+# Chunks fetched per workflow candidate, so pooling sees several chunks of the same workflow
+CHUNKS_PER_CANDIDATE = 4
+# Upper limit pgvector accepts for hnsw.ef_search
+MAX_EF_SEARCH = 1000
+# First pgvector release whose HNSW and IVFFlat scans can continue past ef_search/probes
+ITERATIVE_SCAN_VERSION = (0, 8, 0)
+
+# Recall/latency presets for the query-time index search width. HNSW's
+# ef_search is ef_factor times the LIMIT of the nearest-chunk scan, which it
+# can never go below without returning fewer rows than asked for
+RECALL_PRESETS = {
+    "fast": {"ef_factor": 1, "probes": 1},
+    "balanced": {"ef_factor": 2, "probes": 10},
+    "high": {"ef_factor": 4, "probes": 40},
+}
+
+SEARCH_MODES = ("hybrid", "vector", "keyword")
+# Workflow columns search can return -> result key
+SEARCH_FIELDS = {
+    "id": "id",
+    "name": "name",
+    "category": "category",
+    "tags": "tags",
+    "complexity": "complexity",
+    "description": "description",
+    "original_filename": "originalFilename",
+    "original_workflow": "originalWorkflow",
+}
+DEFAULT_SEARCH_FIELDS = ("id", "name", "category", "tags", "complexity")
+# Distance -> similarity (higher is closer) per metric, used as the vector search score
+VECTOR_SIMILARITY = {
+    "cosine": "1 - {distance}",
+    "l2": "1 / (1 + {distance})",
+    "ip": "-{distance}",
+}
+TEXT_SEARCH_CONFIG = "english"
+# Reciprocal rank fusion damping constant; 60 is the value from the original RRF paper
+RRF_K = 60
+
+# array_to_string is only STABLE, so generated columns need this IMMUTABLE wrapper
+TAGS_TEXT_FUNCTION = """
+CREATE OR REPLACE FUNCTION n8n_mcp_tags_text(tags TEXT[]) RETURNS TEXT
+LANGUAGE sql IMMUTABLE PARALLEL SAFE
+AS $$ SELECT coalesce(array_to_string(tags, ' '), '') $$;
+"""
+
+SEARCH_VECTOR_COLUMN = f"""
+ALTER TABLE workflows ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('{TEXT_SEARCH_CONFIG}', coalesce(name, '')), 'A') ||
+    setweight(to_tsvector('{TEXT_SEARCH_CONFIG}', n8n_mcp_tags_text(tags)), 'B') ||
+    setweight(to_tsvector('{TEXT_SEARCH_CONFIG}', coalesce(description, '')), 'C')
+) STORED;
+"""
+
+SEARCH_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS workflows_search_vector_idx ON workflows USING gin (search_vector);",
+    "CREATE INDEX IF NOT EXISTS workflows_tags_idx ON workflows USING gin (tags);",
+    "CREATE INDEX IF NOT EXISTS workflows_category_idx ON workflows (category);",
+    "CREATE INDEX IF NOT EXISTS workflows_complexity_idx ON workflows ((complexity->>'complexity'));",
+)
+
+def vector_index_name(model: str) -> str:
+    """Name of model's ANN index; the hash keeps it unique within PostgreSQL's 63-byte limit."""
+    slug = re.sub(r"[^a-z0-9]+", "_", model.lower()).strip("_")[:30]
+    return f"workflow_embeddings_{slug}_{hashlib.sha1(model.encode('utf-8')).hexdigest()[:8]}_idx"
+
+def _text_array_literal(values):
+    """Render a list of strings as a PostgreSQL text[] literal."""
+    if not values:
+        return "{}"
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"') for v in values)
+    return "{" + ",".join(f'"{v}"' for v in escaped) + "}"
+
+def _workflow_version_columns(workflow):
+    """The source, version_id and updated_at column values of an enriched workflow."""
+    original = workflow['originalWorkflow'] if isinstance(workflow['originalWorkflow'], dict) else {}
+    return workflow.get('source', 'file'), original.get('versionId'), original.get('updatedAt')
+
+class _CsvRowStream:
+    """Read-only file object that renders rows to CSV lazily for COPY FROM STDIN."""
+
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer, quoting=csv.QUOTE_NOTNULL, lineterminator="\n")
+        self._pending = ""
+        self.row_count = 0
+
+    def read(self, size=-1):
+        pending = [self._pending]
+        pending_size = len(self._pending)
+        while size < 0 or pending_size < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            self._writer.writerow(row)
+            self.row_count += 1
+            text = self._buffer.getvalue()
+            pending.append(text)
+            pending_size += len(text)
+            self._buffer.seek(0)
+            self._buffer.truncate()
+        data = "".join(pending)
+        if size < 0:
+            chunk, self._pending = data, ""
+        else:
+            chunk, self._pending = data[:size], data[size:]
+        return chunk
+
 class PostgresClient:
     def __init__(self):
-        self.connection = None
+        self.pool = None
         self.user = os.getenv("POSTGRES_USER")
         self.password = os.getenv("POSTGRES_PASSWORD")
         self.db = os.getenv("POSTGRES_DB")
         self.host = os.getenv("POSTGRES_HOST")
         self.port = os.getenv("POSTGRES_PORT")
+        self.min_connections = int(os.getenv("POSTGRES_POOL_MIN", "1"))
+        self.max_connections = int(os.getenv("POSTGRES_POOL_MAX", "10"))
+        self.health_check_interval = float(os.getenv("POSTGRES_HEALTH_CHECK_INTERVAL", "30"))
+        self.vector_index_method = os.getenv("POSTGRES_VECTOR_INDEX", "hnsw")
+        self.vector_metric = os.getenv("POSTGRES_VECTOR_METRIC", "cosine")
+        self.vector_quantization = os.getenv("POSTGRES_VECTOR_QUANTIZATION", "none")
+        self._pgvector_version = None
+        # model -> describe_vector_index() result (None when the model has no index)
+        self._vector_indexes = {}
+        self._slots = threading.BoundedSemaphore(self.max_connections)
+        self._pool_lock = threading.Lock()
+        self._last_used = {}
+        self._local = threading.local()
 
-    def connect(self):
-        try:
-            self.connection = psycopg2.connect(
-                user=self.user,
-                password=self.password,
-                host=self.host,
-                port=self.port,
-                database=self.db
-            )
-            print("PostgreSQL database connection successful")
-        except (Exception, psycopg2.Error) as error:
-            print(f"Error while connecting to PostgreSQL: {error}")
-            self.connection = None
+    def connect(self) -> bool:
+        """Create the shared connection pool if it does not exist yet.
+
+        Safe to call before every operation; once the pool is up this is a
+        no-op. Returns whether the pool is available.
+        """
+        if self.pool is not None:
+            return True
+        # Imported here so sessions that never touch PostgreSQL skip loading psycopg2
+        import psycopg2
+        from psycopg2 import pool
+        with self._pool_lock:
+            if self.pool is not None:
+                return True
+            try:
+                self.pool = pool.ThreadedConnectionPool(
+                    self.min_connections,
+                    self.max_connections,
+                    user=self.user,
+                    password=self.password,
+                    host=self.host,
+                    port=self.port,
+                    database=self.db
+                )
+                logger.info("PostgreSQL connection pool created")
+            except (Exception, psycopg2.Error) as error:
+                print(f"Error while connecting to PostgreSQL: {error}")
+                self.pool = None
+        return self.pool is not None
 
     def disconnect(self):
-        if self.connection:
-            self.connection.close()
-            print("PostgreSQL connection closed")
+        with self._pool_lock:
+            if self.pool:
+                self.pool.closeall()
+                self.pool = None
+                self._last_used.clear()
+                logger.info("PostgreSQL connection pool closed")
 
-    def execute_query(self, query, params=None):
-        if not self.connection:
-            print("No connection to the database.")
-            return None
-        
-        cursor = self.connection.cursor()
+    def _get_healthy_connection(self):
+        """Take a connection from the pool, replacing it if it has gone stale."""
+        import psycopg2
+        for _ in range(self.max_connections + 1):
+            conn = self.pool.getconn()
+            if conn.closed:
+                self.pool.putconn(conn, close=True)
+                continue
+            idle = time.monotonic() - self._last_used.get(id(conn), 0)
+            if idle < self.health_check_interval:
+                return conn
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT 1;")
+                conn.rollback()
+                return conn
+            except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                self.pool.putconn(conn, close=True)
+        raise psycopg2.OperationalError("Could not obtain a healthy PostgreSQL connection")
+
+    @contextmanager
+    def _checkout(self):
+        """Borrow a connection, blocking while all max_connections are in use."""
+        self._slots.acquire()
         try:
-            cursor.execute(query, params)
-            self.connection.commit()
-            return cursor
-        except (Exception, psycopg2.Error) as error:
-            print(f"Error executing query: {error}")
-            self.connection.rollback()
-            return None
+            conn = self._get_healthy_connection()
+            try:
+                yield conn
+            finally:
+                self._last_used[id(conn)] = time.monotonic()
+                self.pool.putconn(conn, close=bool(conn.closed))
         finally:
-            cursor.close()
+            self._slots.release()
+
+    @contextmanager
+    def transaction(self):
+        """Run everything inside the block on one connection and commit once.
+
+        execute_query() calls made on this thread while the block is active
+        join the transaction instead of committing individually, and raise
+        instead of swallowing errors so the whole block is rolled back.
+        Nested blocks join the outermost transaction.
+        """
+        import psycopg2
+        active = getattr(self._local, "connection", None)
+        if active is not None:
+            yield active
+            return
+        if not self.connect():
+            raise psycopg2.OperationalError("No connection to the database.")
+        with self._checkout() as conn:
+            self._local.connection = conn
+            try:
+                yield conn
+                conn.commit()
+            except BaseException:
+                if not conn.closed:
+                    conn.rollback()
+                raise
+            finally:
+                self._local.connection = None
+
+    def execute_query(self, query, params=None, fetch=False):
+        """Execute one statement and return its rows (fetch=True) or row count.
+
+        Outside a transaction() block the statement is committed on its own,
+        errors are printed and None is returned. A statement that fails
+        because its connection was dropped is retried once on a fresh one.
+        """
+        started = time.perf_counter()
+        try:
+            result = self._execute_query(query, params, fetch)
+        except BaseException:
+            metrics.observe_backend("postgres", "query", time.perf_counter() - started, error=True)
+            raise
+        metrics.observe_backend("postgres", "query", time.perf_counter() - started, error=result is None)
+        return result
+
+    def _execute_query(self, query, params=None, fetch=False):
+        import psycopg2
+        if getattr(self._local, "connection", None) is not None:
+            with self._local.connection.cursor() as cursor:
+                cursor.execute(query, params)
+                return cursor.fetchall() if fetch else cursor.rowcount
+
+        if not self.connect():
+            print("No connection to the database.")
+            return None
+
+        for attempt in range(2):
+            try:
+                with self.transaction() as conn:
+                    with conn.cursor() as cursor:
+                        cursor.execute(query, params)
+                        return cursor.fetchall() if fetch else cursor.rowcount
+            except (psycopg2.OperationalError, psycopg2.InterfaceError) as error:
+                if attempt == 0 and error.pgcode is None:
+                    logger.warning("PostgreSQL connection lost, retrying: %s", error)
+                    continue
+                print(f"Error executing query: {error}")
+                return None
+            except (Exception, psycopg2.Error) as error:
+                print(f"Error executing query: {error}")
+                return None
 
     def create_workflows_table(self):
         self.execute_query("CREATE EXTENSION IF NOT EXISTS vector;")
@@ -65,24 +361,211 @@ class PostgresClient:
         );
         """
         self.execute_query(query)
+        for column in WORKFLOW_ADDED_COLUMNS:
+            self.execute_query(f"ALTER TABLE workflows ADD COLUMN IF NOT EXISTS {column};")
+        self.execute_query("CREATE INDEX IF NOT EXISTS workflows_source_idx ON workflows (source);")
+        self.execute_query("""
+        CREATE TABLE IF NOT EXISTS sync_state (
+            source TEXT PRIMARY KEY,
+            high_water_mark TIMESTAMP WITH TIME ZONE,
+            synced_at TIMESTAMP WITH TIME ZONE,
+            stats JSONB
+        );
+        """)
+        self.execute_query(TAGS_TEXT_FUNCTION)
+        self.execute_query(SEARCH_VECTOR_COLUMN)
+        for index_query in SEARCH_INDEXES:
+            self.execute_query(index_query)
         
         query_embeddings = """
         CREATE TABLE IF NOT EXISTS workflow_embeddings (
             id SERIAL PRIMARY KEY,
             workflow_id VARCHAR(255) NOT NULL,
-            embedding vector(384),
+            model TEXT NOT NULL DEFAULT '',
+            chunk_index INTEGER NOT NULL DEFAULT 0,
+            embedding vector,
             created_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
             FOREIGN KEY (workflow_id) REFERENCES workflows (id) ON DELETE CASCADE
         );
         """
         self.execute_query(query_embeddings)
+        self.execute_query("ALTER TABLE workflow_embeddings ADD COLUMN IF NOT EXISTS content_hash TEXT;")
+        self.execute_query("ALTER TABLE workflow_embeddings ADD COLUMN IF NOT EXISTS model TEXT NOT NULL DEFAULT '';")
+        self.execute_query("ALTER TABLE workflow_embeddings ADD COLUMN IF NOT EXISTS chunk_index INTEGER NOT NULL DEFAULT 0;")
+        self._migrate_embedding_column()
+        self.execute_query(
+            "CREATE UNIQUE INDEX IF NOT EXISTS workflow_embeddings_chunk_key "
+            "ON workflow_embeddings (workflow_id, model, chunk_index);"
+        )
+        # Superseded by the chunk key, which allows several rows per workflow and model
+        self.execute_query("DROP INDEX IF EXISTS workflow_embeddings_workflow_model_key;")
         print("Tables created or already exist.")
 
+    def _migrate_embedding_column(self):
+        """Turn the vector(384) column of the single-model layout into an untyped vector.
+
+        Its ANN index and its one-embedding-per-workflow unique index go too.
+        Rows written before the model column existed are kept under model ''
+        until they are removed with delete_embedding_model('').
+        """
+        rows = self.execute_query(
+            "SELECT format_type(atttypid, atttypmod) FROM pg_attribute "
+            "WHERE attrelid = 'workflow_embeddings'::regclass AND attname = 'embedding';",
+            fetch=True,
+        )
+        if not rows or rows[0][0] == "vector":
+            return
+        with self.transaction():
+            self.execute_query(f"DROP INDEX IF EXISTS {LEGACY_VECTOR_INDEX_NAME};")
+            self.execute_query("DROP INDEX IF EXISTS workflow_embeddings_workflow_id_key;")
+            self.execute_query("ALTER TABLE workflow_embeddings ALTER COLUMN embedding TYPE vector;")
+        logger.info("Migrated workflow_embeddings.embedding from %s to vector.", rows[0][0])
+
+    def pgvector_version(self):
+        """The installed pgvector version as a tuple such as (0, 7, 4), or None if unknown."""
+        if self._pgvector_version is None:
+            rows = self.execute_query("SELECT extversion FROM pg_extension WHERE extname = 'vector';", fetch=True)
+            if rows:
+                self._pgvector_version = tuple(int(part) for part in re.findall(r"\d+", rows[0][0])[:3])
+        return self._pgvector_version
+
+    def embedding_models(self):
+        """One {model, dimensions, workflows, chunks} entry per model (and dimension) with stored embeddings."""
+        rows = self.execute_query(
+            "SELECT model, vector_dims(embedding), count(DISTINCT workflow_id), count(*) FROM workflow_embeddings "
+            "GROUP BY 1, 2 ORDER BY 1, 2;",
+            fetch=True,
+        )
+        return [
+            {"model": model, "dimensions": dimensions, "workflows": workflows, "chunks": chunks}
+            for model, dimensions, workflows, chunks in rows or []
+        ]
+
+    def create_vector_index(self, model="", method=None, metric=None, quantization=None, dimensions=None,
+                            m=16, ef_construction=64, lists=None, rebuild=False):
+        """Create (or with rebuild=True, drop and recreate) the ANN index on model's embeddings.
+
+        Every model gets a partial index on its rows with the embedding cast
+        to its dimensions, which are read from the stored embeddings unless
+        given. Returns None when the model has no embeddings yet.
+
+        method is "hnsw" or "ivfflat", metric one of VECTOR_METRICS and
+        quantization one of VECTOR_QUANTIZATIONS; halfvec halves the index
+        size and binary shrinks it 32x, both need pgvector 0.7. For IVFFlat,
+        lists defaults to rows / 1000 (at least 10), so it should be rebuilt
+        once the table has been populated.
+        """
+        method = method or self.vector_index_method
+        metric = metric or self.vector_metric
+        quantization = quantization or self.vector_quantization
+        if method not in ("hnsw", "ivfflat"):
+            raise ValueError(f"Unknown vector index method: {method}")
+        if metric not in VECTOR_METRICS:
+            raise ValueError(f"Unknown vector distance metric: {metric}")
+        if quantization not in VECTOR_QUANTIZATIONS:
+            raise ValueError(f"Unknown vector quantization: {quantization}")
+        expression, required = VECTOR_QUANTIZATIONS[quantization]
+        version = self.pgvector_version()
+        if version and version < required:
+            raise ValueError(
+                f"{quantization} quantization needs pgvector {'.'.join(map(str, required))} or later "
+                f"(installed: {'.'.join(map(str, version))})"
+            )
+
+        stored = [entry for entry in self.embedding_models() if entry["model"] == model]
+        if dimensions is None:
+            if not stored:
+                return None
+            if len(stored) > 1:
+                raise ValueError(
+                    f"Embeddings of model {model!r} have several dimensions "
+                    f"({', '.join(str(entry['dimensions']) for entry in stored)}); vectorize them again first."
+                )
+            dimensions = stored[0]["dimensions"]
+
+        opclass = VECTOR_METRICS[metric][1]
+        if quantization == "binary":
+            opclass = BINARY_OPCLASS
+        elif quantization == "halfvec":
+            opclass = opclass.replace("vector_", "halfvec_", 1)
+        if method == "hnsw":
+            options = f"m = {int(m)}, ef_construction = {int(ef_construction)}"
+        else:
+            if lists is None:
+                lists = max(10, sum(entry["chunks"] for entry in stored) // 1000)
+            options = f"lists = {int(lists)}"
+
+        name = vector_index_name(model)
+        indexed = expression.format(value="embedding", dimensions=int(dimensions))
+        with self.transaction():
+            if rebuild:
+                self.execute_query(f"DROP INDEX IF EXISTS {name};")
+            self.execute_query(
+                f"CREATE INDEX IF NOT EXISTS {name} ON workflow_embeddings "
+                f"USING {method} (({indexed}) {opclass}) WITH ({options}) WHERE model = %s;",
+                (model,),
+            )
+        self._vector_indexes.pop(model, None)
+        return self.describe_vector_index(model)
+
+    def ensure_vector_index(self, model=""):
+        """Create model's ANN index with the configured settings unless it exists or indexing is off."""
+        if self.vector_index_method == "none":
+            return None
+        index = self.describe_vector_index(model)
+        if index is not None:
+            return index
+        try:
+            return self.create_vector_index(model)
+        except Exception as error:
+            logger.error("Error creating vector index for model %r: %s", model, error)
+            return None
+
+    def describe_vector_index(self, model=""):
+        """Read model's ANN index definition, which searches follow for operator and quantization."""
+        name = vector_index_name(model)
+        rows = self.execute_query(
+            "SELECT indexdef FROM pg_indexes WHERE indexname = %s AND schemaname = ANY(current_schemas(false));",
+            (name,), fetch=True,
+        )
+        if rows is None:
+            return None
+        index = None
+        if rows:
+            definition = rows[0][0]
+            if BINARY_OPCLASS in definition:
+                # Hamming distance only shortlists; re-ranking uses the configured metric
+                quantization, metric = "binary", self.vector_metric
+            else:
+                quantization = "halfvec" if "halfvec" in definition else "none"
+                # The l2 operator classes are the defaults, so pg_indexes omits them.
+                metric = next((metric for metric in VECTOR_METRICS if f"_{metric}_ops" in definition), "l2")
+            dimensions = re.search(r"::(?:vector|halfvec|bit)\((\d+)\)", definition)
+            index = {
+                "name": name,
+                "model": model,
+                "method": "ivfflat" if "USING ivfflat" in definition else "hnsw",
+                "metric": metric,
+                "quantization": quantization,
+                "dimensions": int(dimensions.group(1)) if dimensions else None,
+                "definition": definition,
+            }
+        self._vector_indexes[model] = index
+        return index
+
+    def delete_embedding_model(self, model):
+        """Drop every embedding of model and its ANN index, e.g. after switching to another model."""
+        with self.transaction():
+            self.execute_query(f"DROP INDEX IF EXISTS {vector_index_name(model)};")
+            deleted = self.execute_query("DELETE FROM workflow_embeddings WHERE model = %s;", (model,))
+        self._vector_indexes.pop(model, None)
+        return deleted
+
     def insert_workflow(self, workflow):
-        query = """
-        INSERT INTO workflows (id, original_filename, category, name, description, tags, complexity, original_workflow)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        ON CONFLICT (id) DO NOTHING;
+        query = f"""
+        INSERT INTO workflows ({", ".join(WORKFLOW_COLUMNS)})
+        VALUES ({", ".join(["%s"] * len(WORKFLOW_COLUMNS))})
+        {WORKFLOW_UPSERT};
         """
         params = (
             workflow['id'],
@@ -92,36 +575,390 @@ class PostgresClient:
             workflow['description'],
             workflow['tags'],
             json.dumps(workflow['complexity']),
-            json.dumps(workflow['originalWorkflow'])
+            json.dumps(workflow['originalWorkflow']),
+            *_workflow_version_columns(workflow),
         )
         self.execute_query(query, params)
 
-    def insert_workflow_embedding(self, workflow_id, embedding):
+    def bulk_upsert_workflows(self, workflows, batch_size=None, on_progress=None):
+        """Upsert many workflows with one COPY and one merge statement per batch.
+
+        Rows are streamed into a temporary staging table with COPY and then
+        merged into workflows in the same transaction. Rows whose content is
+        unchanged, and rows stored from another source, are left untouched. When the same id appears more than once
+        the last occurrence wins. With batch_size, every batch of that many
+        rows is committed on its own and on_progress(rows done, total) is
+        called after each commit, so an interrupted load keeps the batches
+        already written. Returns counts and rows per second.
+        """
+        start = time.perf_counter()
+        latest = list({workflow['id']: workflow for workflow in workflows}.values())
+        batch_size = batch_size or max(1, len(latest))
+        columns = ", ".join(WORKFLOW_COLUMNS)
+        rows_done = written = 0
+
+        for offset in range(0, len(latest), batch_size):
+            rows = (
+                (
+                    workflow['id'],
+                    workflow['originalFilename'],
+                    workflow['category'],
+                    workflow['name'],
+                    workflow['description'],
+                    _text_array_literal(workflow['tags']),
+                    json.dumps(workflow['complexity'], separators=(",", ":")),
+                    json.dumps(workflow['originalWorkflow'], separators=(",", ":")),
+                    *_workflow_version_columns(workflow),
+                )
+                for workflow in latest[offset:offset + batch_size]
+            )
+            stream = _CsvRowStream(rows)
+            with metrics.time_backend("postgres", "bulk_upsert"), self.transaction() as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(
+                        f"CREATE TEMP TABLE workflows_staging ON COMMIT DROP AS "
+                        f"SELECT {columns} FROM workflows WITH NO DATA;"
+                    )
+                    cursor.copy_expert(
+                        f"COPY workflows_staging ({columns}) FROM STDIN WITH (FORMAT csv)", stream, size=1 << 20
+                    )
+                    cursor.execute(
+                        f"INSERT INTO workflows ({columns}) SELECT {columns} FROM workflows_staging {WORKFLOW_UPSERT};"
+                    )
+                    written += cursor.rowcount
+            rows_done += stream.row_count
+            if on_progress:
+                on_progress(rows_done, len(latest))
+
+        elapsed = time.perf_counter() - start
+        return {
+            "rows": rows_done,
+            "written": written,
+            "unchanged": rows_done - written,
+            "seconds": round(elapsed, 3),
+            "rowsPerSecond": round(rows_done / elapsed, 1) if elapsed > 0 else None,
+        }
+
+    def get_workflow_versions(self, source="n8n"):
+        """Return {workflow_id: (version_id, updated_at)} for the workflows stored from source."""
+        rows = self.execute_query(
+            "SELECT id, version_id, updated_at FROM workflows WHERE source = %s;", (source,), fetch=True
+        )
+        return {workflow_id: (version_id, updated_at) for workflow_id, version_id, updated_at in rows or []}
+
+    def get_workflow_descriptions(self, source="n8n"):
+        """Return [{id, description}] for the workflows stored from source, e.g. to check their embeddings."""
+        rows = self.execute_query(
+            "SELECT id, description FROM workflows WHERE source = %s ORDER BY id;", (source,), fetch=True
+        )
+        return [{"id": workflow_id, "description": description or ""} for workflow_id, description in rows or []]
+
+    def existing_workflow_ids(self, workflow_ids):
+        """The subset of workflow_ids that have a row in workflows."""
+        if not workflow_ids:
+            return set()
+        rows = self.execute_query("SELECT id FROM workflows WHERE id = ANY(%s);", (list(workflow_ids),), fetch=True)
+        return {workflow_id for workflow_id, in rows or []}
+
+    def delete_workflows(self, workflow_ids):
+        """Delete workflows and, through the foreign key, all their embeddings."""
+        if not workflow_ids:
+            return 0
+        return self.execute_query("DELETE FROM workflows WHERE id = ANY(%s);", (list(workflow_ids),))
+
+    def get_sync_state(self, source="n8n"):
+        """Return the stored high-water mark and last sync time of source, or None before the first sync."""
+        rows = self.execute_query(
+            "SELECT high_water_mark, synced_at, stats FROM sync_state WHERE source = %s;", (source,), fetch=True
+        )
+        if not rows:
+            return None
+        high_water_mark, synced_at, stats = rows[0]
+        return {"highWaterMark": high_water_mark, "syncedAt": synced_at, "stats": stats}
+
+    def set_sync_state(self, high_water_mark, stats=None, source="n8n"):
+        """Record a completed sync of source."""
         query = """
-        INSERT INTO workflow_embeddings (workflow_id, embedding)
-        VALUES (%s, %s)
-        ON CONFLICT (workflow_id) DO UPDATE SET embedding = EXCLUDED.embedding;
+        INSERT INTO sync_state (source, high_water_mark, synced_at, stats)
+        VALUES (%s, %s, CURRENT_TIMESTAMP, %s)
+        ON CONFLICT (source) DO UPDATE SET
+            high_water_mark = EXCLUDED.high_water_mark,
+            synced_at = EXCLUDED.synced_at,
+            stats = EXCLUDED.stats;
         """
-        params = (workflow_id, embedding)
-        self.execute_query(query, params)
+        self.execute_query(query, (source, high_water_mark, json.dumps(stats) if stats is not None else None))
 
-    def search_similar_workflows(self, embedding, top_k=5):
+    def insert_workflow_embedding(self, workflow_id, embedding, content_hash=None, model="", chunk_index=0):
         query = """
-        SELECT w.*
-        FROM workflows w
-        JOIN workflow_embeddings we ON w.id = we.workflow_id
-        ORDER BY we.embedding <-> %s
-        LIMIT %s;
-        """
-        params = (embedding, top_k)
-        cursor = self.execute_query(query, params)
-        if cursor:
-            return cursor.fetchall()
-        return []
+        INSERT INTO workflow_embeddings (workflow_id, model, chunk_index, embedding, content_hash)
+        VALUES (%s, %s, %s, %s, %s)
+        ON CONFLICT (workflow_id, model, chunk_index) DO UPDATE
+        SET embedding = EXCLUDED.embedding, content_hash = EXCLUDED.content_hash, created_at = CURRENT_TIMESTAMP;
+        """
+        params = (workflow_id, model, chunk_index, str(embedding), content_hash)
+        self.execute_query(query, params)
+
+    def replace_workflow_chunks(self, workflow_id, embeddings, content_hash=None, model=""):
+        """Store one row per chunk embedding of a workflow and drop chunks beyond the new count."""
+        rows = [(workflow_id, model, chunk_index, str(embedding), content_hash)
+                for chunk_index, embedding in enumerate(embeddings)]
+        query = f"""
+        INSERT INTO workflow_embeddings (workflow_id, model, chunk_index, embedding, content_hash)
+        VALUES {", ".join(["(%s, %s, %s, %s, %s)"] * len(rows))}
+        ON CONFLICT (workflow_id, model, chunk_index) DO UPDATE
+        SET embedding = EXCLUDED.embedding, content_hash = EXCLUDED.content_hash, created_at = CURRENT_TIMESTAMP;
+        """
+        with self.transaction():
+            if rows:
+                self.execute_query(query, [value for row in rows for value in row])
+            self.execute_query(
+                "DELETE FROM workflow_embeddings WHERE workflow_id = %s AND model = %s AND chunk_index >= %s;",
+                (workflow_id, model, len(rows)),
+            )
+
+    def get_embedding_hashes(self, model="", workflow_ids=None):
+        """Return {workflow_id: content_hash} for every workflow (or those of workflow_ids) with embeddings stored for model."""
+        query = "SELECT workflow_id, content_hash FROM workflow_embeddings WHERE model = %s AND chunk_index = 0"
+        params = (model,)
+        if workflow_ids is not None:
+            query += " AND workflow_id = ANY(%s)"
+            params += (list(workflow_ids),)
+        rows = self.execute_query(query + ";", params, fetch=True)
+        return dict(rows) if rows else {}
+
+    def delete_workflow_embeddings(self, workflow_ids, model=None):
+        """Delete the embeddings of workflow_ids for model, or for every model when it is None."""
+        if not workflow_ids:
+            return
+        if model is None:
+            query, params = "DELETE FROM workflow_embeddings WHERE workflow_id = ANY(%s);", (list(workflow_ids),)
+        else:
+            query = "DELETE FROM workflow_embeddings WHERE workflow_id = ANY(%s) AND model = %s;"
+            params = (list(workflow_ids), model)
+        self.execute_query(query, params)
+
+    def search_similar_workflows(self, embedding, top_k=5, recall="balanced", offset=0,
+                                 fields=None, include_workflow=False, model="", pooling="max"):
+        """Nearest workflows by embedding distance, using the ANN index when present.
+
+        recall picks a RECALL_PRESETS entry (or a dict with ef_factor or
+        ef_search, and probes) that sets how widely HNSW or IVFFlat searches
+        for this query only.
+        Results are projected like hybrid_search_workflows, with the
+        similarity as score.
+        """
+        return self.hybrid_search_workflows(
+            embedding=embedding, top_k=top_k, mode="vector", recall=recall,
+            offset=offset, fields=fields, include_workflow=include_workflow, model=model, pooling=pooling,
+        )
+
+    @staticmethod
+    def _search_filters(filters, params):
+        """SQL conditions on workflows w for category, complexity and tags filters.
+
+        Each condition matches an index (category and complexity b-trees, the
+        GIN index on tags), so they narrow the full-text scan. An HNSW or
+        IVFFlat scan cannot use them; hybrid_search_workflows makes filtered
+        vector searches scan iteratively or exactly instead.
+        """
+        conditions = []
+        filters = filters or {}
+        if filters.get("category"):
+            params["categories"] = list(filters["category"]) if isinstance(filters["category"], list) else [filters["category"]]
+            conditions.append("w.category = ANY(%(categories)s)")
+        if filters.get("complexity"):
+            params["complexities"] = list(filters["complexity"]) if isinstance(filters["complexity"], list) else [filters["complexity"]]
+            conditions.append("w.complexity->>'complexity' = ANY(%(complexities)s)")
+        if filters.get("tags"):
+            params["tags"] = list(filters["tags"])
+            conditions.append("w.tags @> %(tags)s::text[]")
+        return conditions
+
+    def hybrid_search_workflows(self, query_text=None, embedding=None, top_k=5, mode="hybrid",
+                                filters=None, recall="balanced", rrf_k=RRF_K, offset=0,
+                                fields=None, include_workflow=False, model="", pooling="max"):
+        """Rank workflows by full-text match, embedding distance, or both fused with RRF.
+
+        mode is "keyword" (full-text only, no embedding needed), "vector", or
+        "hybrid". In hybrid mode each ranking contributes 1 / (rrf_k + rank)
+        for its top candidates and the score is their sum; a single ranking
+        scores by ts_rank_cd or by similarity (1 - cosine distance, negative
+        inner product, or 1 / (1 + L2 distance)). filters may hold category,
+        complexity (a single value or a list each) and tags (all required).
+        Only embeddings of model are searched, through its ANN index if it has
+        one; a quantized index shortlists RERANK_FACTOR times the candidates,
+        which are re-ranked at full precision. With filters, the ANN scan
+        would only return the first ef_search rows before filtering, so it
+        scans iteratively until enough rows match (pgvector 0.8) or the
+        filtered rows are ranked exactly. Workflows are embedded in
+        chunks, and the nearest chunks are pooled per workflow: pooling "max"
+        scores a workflow by its closest chunk, "sum" adds up the
+        similarities of all its chunks among the nearest.
+
+        Returns one dict per hit with the SEARCH_FIELDS in fields (default
+        DEFAULT_SEARCH_FIELDS) and score; hybrid hits also carry vectorRank
+        and textRank. Only the selected columns are read, so the
+        original_workflow JSONB is not detoasted unless include_workflow is
+        set. offset skips that many hits for paging.
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {mode}")
+        if pooling not in CHUNK_POOLING:
+            raise ValueError(f"Unknown chunk pooling: {pooling}")
+        use_text = mode in ("hybrid", "keyword") and bool(query_text and query_text.strip())
+        use_vector = mode in ("hybrid", "vector") and embedding is not None
+        if not use_text and not use_vector:
+            return []
+
+        columns = [field for field in (fields or DEFAULT_SEARCH_FIELDS) if field in SEARCH_FIELDS]
+        if "id" not in columns:
+            columns.insert(0, "id")
+        if include_workflow and "original_workflow" not in columns:
+            columns.append("original_workflow")
+        offset = max(0, int(offset))
+        params = {"top_k": top_k, "offset": offset, "candidates": max((offset + top_k) * 4, 40), "rrf_k": rrf_k}
+        conditions = self._search_filters(filters, params)
+        ctes, rankings = [], []
+        if use_text:
+            params["query_text"] = query_text
+            where = " AND ".join(["w.search_vector @@ q"] + conditions)
+            ctes.append(f"""
+            lexical AS (
+                SELECT id, text_score, row_number() OVER (ORDER BY text_score DESC, id) AS rank
+                FROM (
+                    SELECT w.id, ts_rank_cd(w.search_vector, q) AS text_score
+                    FROM workflows w, websearch_to_tsquery('{TEXT_SEARCH_CONFIG}', %(query_text)s) q
+                    WHERE {where}
+                    ORDER BY text_score DESC, w.id
+                    LIMIT %(candidates)s
+                ) matches
+            )""")
+            rankings.append("lexical")
+        if use_vector:
+            if model not in self._vector_indexes:
+                self.describe_vector_index(model)
+            index = self._vector_indexes.get(model) or {}
+            metric = index.get("metric", self.vector_metric)
+            quantization = index.get("quantization", "none")
+            operator = VECTOR_METRICS.get(metric, VECTOR_METRICS["cosine"])[0]
+            similarity = VECTOR_SIMILARITY.get(metric, VECTOR_SIMILARITY["cosine"])
+            dimensions = len(embedding)
+            params.update({
+                "embedding": str(embedding),
+                "model": model,
+                "chunk_candidates": params["candidates"] * CHUNKS_PER_CANDIDATE,
+            })
+            where = " AND ".join(["e.model = %(model)s"] + conditions)
+            exact = VECTOR_QUANTIZATIONS["none"][0]
+            query_vector = exact.format(value="%(embedding)s", dimensions=dimensions)
+            version = self.pgvector_version()
+            iterative_scan = bool(conditions) and version is not None and version >= ITERATIVE_SCAN_VERSION
+            exact_scan = bool(conditions) and not iterative_scan
+            if quantization == "none" or exact_scan:
+                stored = exact.format(value="e.embedding", dimensions=dimensions)
+                # "+ 0" hides the distance from the ANN index, so the filtered rows are ranked exactly
+                order = f"({stored} {operator} {query_vector}) + 0" if exact_scan else f"{stored} {operator} {query_vector}"
+                nearest = f"""
+                    SELECT e.workflow_id AS id, {stored} {operator} {query_vector} AS distance
+                    FROM workflow_embeddings e
+                    JOIN workflows w ON w.id = e.workflow_id
+                    WHERE {where}
+                    ORDER BY {order}
+                    LIMIT %(chunk_candidates)s"""
+            else:
+                quantized = VECTOR_QUANTIZATIONS[quantization][0]
+                shortlist_operator = BINARY_OPERATOR if quantization == "binary" else operator
+                params["shortlist"] = params["chunk_candidates"] * RERANK_FACTOR
+                nearest = f"""
+                    SELECT id, {exact.format(value="embedding", dimensions=dimensions)} {operator} {query_vector} AS distance
+                    FROM (
+                        SELECT e.workflow_id AS id, e.embedding
+                        FROM workflow_embeddings e
+                        JOIN workflows w ON w.id = e.workflow_id
+                        WHERE {where}
+                        ORDER BY {quantized.format(value="e.embedding", dimensions=dimensions)} {shortlist_operator}
+                                 {quantized.format(value="%(embedding)s::vector", dimensions=dimensions)}
+                        LIMIT %(shortlist)s
+                    ) shortlist
+                    ORDER BY distance, id
+                    LIMIT %(chunk_candidates)s"""
+            ctes.append(f"""
+            semantic AS (
+                SELECT id, similarity, row_number() OVER (ORDER BY similarity DESC, id) AS rank
+                FROM (
+                    SELECT id, {pooling}({similarity.format(distance="distance")}) AS similarity
+                    FROM ({nearest}
+                    ) nearest
+                    GROUP BY id
+                    ORDER BY similarity DESC, id
+                    LIMIT %(candidates)s
+                ) pooled
+            )""")
+            rankings.append("semantic")
+
+        if len(rankings) == 2:
+            fused = """
+            SELECT coalesce(semantic.id, lexical.id) AS id,
+                   coalesce(1.0 / (%(rrf_k)s + semantic.rank), 0)
+                   + coalesce(1.0 / (%(rrf_k)s + lexical.rank), 0) AS score,
+                   semantic.rank AS vector_rank, lexical.rank AS text_rank
+            FROM semantic FULL OUTER JOIN lexical ON lexical.id = semantic.id"""
+            extra = ["vectorRank", "textRank"]
+        elif rankings == ["lexical"]:
+            fused = "SELECT id, text_score AS score, NULL::bigint AS vector_rank, rank AS text_rank FROM lexical"
+            extra = []
+        else:
+            fused = "SELECT id, similarity AS score, rank AS vector_rank, NULL::bigint AS text_rank FROM semantic"
+            extra = []
+
+        select_list = ", ".join(f"w.{column}" for column in columns)
+        query = f"""
+        WITH {",".join(ctes)},
+        fused AS ({fused})
+        SELECT {select_list}, fused.score, fused.vector_rank, fused.text_rank
+        FROM fused
+        JOIN workflows w ON w.id = fused.id
+        ORDER BY fused.score DESC, w.id
+        LIMIT %(top_k)s OFFSET %(offset)s;
+        """
+        try:
+            with self.transaction():
+                if use_vector:
+                    settings = recall if isinstance(recall, dict) else RECALL_PRESETS.get(recall, RECALL_PRESETS["balanced"])
+                    # The index has to return at least as many rows as the LIMIT of the nearest-chunk scan
+                    scan_limit = params.get("shortlist", params["chunk_candidates"])
+                    if "ef_search" in settings:
+                        ef_search = max(int(settings["ef_search"]), scan_limit)
+                    else:
+                        ef_search = int(scan_limit * max(1.0, float(settings.get("ef_factor", 1))))
+                    self.execute_query(
+                        "SELECT set_config('hnsw.ef_search', %s, true), set_config('ivfflat.probes', %s, true);",
+                        (str(min(ef_search, MAX_EF_SEARCH)), str(int(settings.get("probes", 1)))),
+                    )
+                    if iterative_scan:
+                        # Keep scanning the index until the LIMIT is met by rows that pass the filters
+                        self.execute_query(
+                            "SELECT set_config('hnsw.iterative_scan', 'strict_order', true), "
+                            "set_config('ivfflat.iterative_scan', 'relaxed_order', true);"
+                        )
+                rows = self.execute_query(query, params, fetch=True) or []
+        except Exception as error:
+            logger.error("Error searching workflows: %s", error)
+            return []
+
+        keys = [SEARCH_FIELDS.get(column, column) for column in columns] + ["score", "vectorRank", "textRank"]
+        results = []
+        for row in rows:
+            hit = dict(zip(keys, row))
+            hit["score"] = round(float(hit["score"]), 6)
+            for key in ("vectorRank", "textRank"):
+                if key not in extra:
+                    hit.pop(key)
+            results.append(hit)
+        return results
 
 if __name__ == '__main__':
     client = PostgresClient()
-    client.connect()
-    if client.connection:
+    if client.connect():
         client.create_workflows_table()
         client.disconnect()
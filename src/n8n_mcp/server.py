@@ -1,22 +1,100 @@
+import os
+import sys
+import time
+import logging
 import asyncio
 import json
+import requests
 from mcp.server.models import InitializationOptions
 import mcp.types as types
 from mcp.server import NotificationOptions, Server
+from mcp.server.lowlevel.helper_types import ReadResourceContents
 from pydantic import AnyUrl
 import mcp.server.stdio
 
-from n8n_mcp.n8n_api_client import N8nApiClient
-from n8n_mcp.postgres_client import PostgresClient
-from n8n_mcp.workflow_parser import process_all_workflows, process_workflow
+from n8n_mcp.n8n_api_client import MAX_PAGE_SIZE, N8nApiClient
+from n8n_mcp.workflow_cache import CachedN8nApiClient
+from n8n_mcp.postgres_client import DEFAULT_SEARCH_FIELDS, SEARCH_FIELDS, PostgresClient
+from n8n_mcp.workflow_parser import OUTPUT_DIR, chunk_description, process_all_workflows, process_workflow
 from n8n_mcp.workflow_validator import validate_workflow
+from n8n_mcp.workflow_sync import fetch_changed_workflows
+from n8n_mcp.bulk_importer import import_workflows
+from n8n_mcp.bulk_validator import ValidationCache, summarize_validation, validate_workflows
 from n8n_mcp.embedding_client import EmbeddingClient
+from n8n_mcp.backend_executor import BackendExecutor
+from n8n_mcp.metrics import PrometheusFileWriter, metrics
+from n8n_mcp.jobs import JobManager
 from pathlib import Path
 
 server = Server("n8n-mcp")
-n8n_client = N8nApiClient()
-postgres_client = PostgresClient()
-embedding_client = EmbeddingClient()
+backends = BackendExecutor()
+validation_cache = ValidationCache()
+jobs = JobManager()
+prometheus_file = PrometheusFileWriter(metrics)
+metrics.register_cache("validation", validation_cache.stats)
+METRICS_URI = "metrics://n8n-mcp/metrics.json"
+PROMETHEUS_URI = "metrics://n8n-mcp/metrics.prom"
+DEFAULT_LIST_FIELDS = ["id", "name", "active", "tags", "updatedAt"]
+# Tools whose results can be large are returned without indentation
+COMPACT_TOOLS = {"list_workflows", "validate_all_workflows", "search_similar_workflows"}
+# Background jobs: rows committed per load batch, workflows embedded and stored per vectorize checkpoint
+LOAD_BATCH_SIZE = 1000
+VECTORIZE_CHECKPOINT_SIZE = 500
+# Seconds between progress notifications while a tool call waits on a job, and the longest wait allowed
+JOB_POLL_INTERVAL = 0.5
+MAX_JOB_WAIT = 300
+WAIT_PROPERTY = {
+    "type": "number",
+    "default": 0,
+    "description": f"Seconds (up to {MAX_JOB_WAIT}) to wait for the job to finish before returning its status.",
+}
+local_index_path = os.getenv("LOCAL_VECTOR_INDEX_PATH")
+# Clients are created by the getters below on first use, so starting a
+# session costs neither their setup nor the numpy and psycopg2 imports
+_n8n_client = None
+_postgres_client = None
+_embedding_client = None
+_local_index = None
+# Names from handle_list_tools, read on the first tool call
+_tool_names = None
+
+def get_n8n_client() -> CachedN8nApiClient:
+    global _n8n_client
+    if _n8n_client is None:
+        _n8n_client = CachedN8nApiClient(N8nApiClient())
+        metrics.register_cache("n8n", _n8n_client.stats)
+    return _n8n_client
+
+def get_postgres_client() -> PostgresClient:
+    global _postgres_client
+    if _postgres_client is None:
+        _postgres_client = PostgresClient()
+    return _postgres_client
+
+def get_embedding_client() -> EmbeddingClient:
+    global _embedding_client
+    if _embedding_client is None:
+        _embedding_client = EmbeddingClient()
+        if _embedding_client.cache is not None:
+            metrics.register_cache("embedding", _embedding_client.cache.stats)
+    return _embedding_client
+
+def get_local_index():
+    """The on-disk vector index used when PostgreSQL is unavailable, if one is configured.
+
+    An index built with a different embedding model is replaced by an empty
+    one, which vectorize_workflows fills again.
+    """
+    global _local_index
+    if _local_index is None and local_index_path:
+        from n8n_mcp.vector_index import VectorIndex
+        model = get_embedding_client().model_name
+        index = VectorIndex.load(local_index_path) if VectorIndex.exists(local_index_path) else None
+        if index is None or index.model != model:
+            # Vectors of another model may differ in dimension and are never comparable
+            index = VectorIndex(model=model)
+        _local_index = index
+    return _local_index
 
 @server.list_tools()
 async def handle_list_tools() -> list[types.Tool]:
@@ -24,8 +102,23 @@ async def handle_list_tools() -> list[types.Tool]:
     return [
         types.Tool(
             name="list_workflows",
-            description="List all workflows from n8n.",
-            inputSchema={"type": "object", "properties": {}},
+            description="List workflows from n8n one page at a time, returning only the requested fields.",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "limit": {"type": "integer", "default": 50, "description": "Maximum workflows to return."},
+                    "cursor": {"type": "string", "description": "nextCursor from a previous call."},
+                    "fields": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "default": DEFAULT_LIST_FIELDS,
+                        "description": "Top-level workflow fields to include, e.g. nodes or connections.",
+                    },
+                    "active": {"type": "boolean"},
+                    "tags": {"type": "array", "items": {"type": "string"}, "description": "Only workflows with these tags."},
+                    "name": {"type": "string", "description": "Only workflows with this name."},
+                },
+            },
         ),
         types.Tool(
             name="get_workflow",
@@ -57,6 +150,28 @@ async def handle_list_tools() -> list[types.Tool]:
                 "required": ["workflow_id", "workflow_data"],
             },
         ),
+        types.Tool(
+            name="import_workflows",
+            description=(
+                "Create or update workflows in n8n from a directory of JSON files or a JSONL file, "
+                "skipping workflows already imported unchanged."
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "path": {"type": "string", "description": "Directory of *.json files or a .jsonl file."},
+                    "checkpoint": {"type": "string", "description": "Checkpoint file used to skip and resume."},
+                    "rate": {"type": "number", "description": "Requests per second; 0 for no limit."},
+                    "concurrency": {"type": "integer", "description": "Concurrent requests."},
+                    "match_existing": {
+                        "type": "boolean",
+                        "default": False,
+                        "description": "Update existing workflows with the same name instead of creating copies.",
+                    },
+                },
+                "required": ["path"],
+            },
+        ),
         types.Tool(
             name="validate_workflow",
             description="Validate a workflow against best practices.",
@@ -69,10 +184,32 @@ async def handle_list_tools() -> list[types.Tool]:
                 "required": ["workflow_id"],
             },
         ),
+        types.Tool(
+            name="validate_all_workflows",
+            description=(
+                "Validate every workflow, or a filtered subset, and return an aggregated report "
+                "with per-rule counts. Unchanged workflows reuse earlier results."
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "options": {"type": "object"},
+                    "workflow_ids": {"type": "array", "items": {"type": "string"}, "description": "Only these workflows."},
+                    "active": {"type": "boolean"},
+                    "tags": {"type": "array", "items": {"type": "string"}, "description": "Only workflows with these tags."},
+                    "name": {"type": "string", "description": "Only workflows with this name."},
+                    "include_passed": {"type": "boolean", "default": False, "description": "List passing workflows too."},
+                },
+            },
+        ),
         types.Tool(
             name="vectorize_workflows",
-            description="Generate and store vector embeddings for all workflows to be used for context search.",
-            inputSchema={"type": "object", "properties": {}},
+            description=(
+                "Generate and store vector embeddings for all workflows to be used for context search; "
+                "long descriptions are embedded in chunks. Runs as a background job and returns its id; "
+                "embeddings are committed as they go, so running it again after a cancel or restart resumes."
+            ),
+            inputSchema={"type": "object", "properties": {"wait": WAIT_PROPERTY}},
         ),
         types.Tool(
             name="search_similar_workflows",
@@ -82,91 +219,667 @@ async def handle_list_tools() -> list[types.Tool]:
                 "properties": {
                     "query": {"type": "string"},
                     "top_k": {"type": "integer", "default": 5},
+                    "recall": {
+                        "type": "string",
+                        "enum": ["fast", "balanced", "high"],
+                        "default": "balanced",
+                        "description": "Trade search latency for recall on the vector index.",
+                    },
+                    "mode": {
+                        "type": "string",
+                        "enum": ["hybrid", "vector", "keyword"],
+                        "default": "hybrid",
+                        "description": "Fuse full-text and vector ranking, or use one; keyword needs no embedding.",
+                    },
+                    "pooling": {
+                        "type": "string",
+                        "enum": ["max", "sum"],
+                        "default": "max",
+                        "description": "Score a workflow by its best matching description chunk, or by all of them.",
+                    },
+                    "category": {"type": "array", "items": {"type": "string"}},
+                    "complexity": {"type": "array", "items": {"type": "string", "enum": ["simple", "moderate", "complex"]}},
+                    "tags": {"type": "array", "items": {"type": "string"}, "description": "Only workflows with all these tags."},
+                    "fields": {
+                        "type": "array",
+                        "items": {"type": "string", "enum": sorted(SEARCH_FIELDS)},
+                        "default": list(DEFAULT_SEARCH_FIELDS),
+                        "description": "Workflow fields to return with each hit's score.",
+                    },
+                    "include_workflow": {
+                        "type": "boolean",
+                        "default": False,
+                        "description": "Also return each hit's full workflow JSON.",
+                    },
+                    "cursor": {"type": "string", "description": "nextCursor from a previous call."},
                 },
                 "required": ["query"],
             },
         ),
         types.Tool(
             name="load_workflows_to_postgres",
-            description="Load workflow metadata into the PostgreSQL database for production use.",
-            inputSchema={"type": "object", "properties": {}},
+            description=(
+                "Load workflow metadata into the PostgreSQL database for production use. Runs as a background "
+                "job and returns its id; rows are committed in batches, so running it again resumes."
+            ),
+            inputSchema={"type": "object", "properties": {"wait": WAIT_PROPERTY}},
+        ),
+        types.Tool(
+            name="rebuild_vector_index",
+            description=(
+                "Create or rebuild the approximate nearest neighbour index on one embedding model's "
+                "workflow embeddings, optionally quantized with full-precision re-ranking."
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "model": {"type": "string", "description": "Embedding model; defaults to EMBEDDING_MODEL_NAME."},
+                    "method": {
+                        "type": "string",
+                        "enum": ["hnsw", "ivfflat"],
+                        "description": "Index type; defaults to POSTGRES_VECTOR_INDEX.",
+                    },
+                    "metric": {
+                        "type": "string",
+                        "enum": ["cosine", "l2", "ip"],
+                        "description": "Distance metric; defaults to POSTGRES_VECTOR_METRIC.",
+                    },
+                    "quantization": {
+                        "type": "string",
+                        "enum": ["none", "halfvec", "binary"],
+                        "description": "Index half-precision (2x smaller) or binary (32x smaller) vectors; needs pgvector 0.7. "
+                                       "Defaults to POSTGRES_VECTOR_QUANTIZATION.",
+                    },
+                    "m": {"type": "integer", "default": 16, "description": "HNSW max connections per layer."},
+                    "ef_construction": {"type": "integer", "default": 64, "description": "HNSW build candidate list size."},
+                    "lists": {"type": "integer", "description": "IVFFlat list count; defaults to rows / 1000."},
+                },
+            },
+        ),
+        types.Tool(
+            name="sync_workflows",
+            description=(
+                "Bring the PostgreSQL catalog up to date with n8n: only workflows changed since the last sync "
+                "are parsed and upserted, workflows deleted in n8n are removed, and synced workflows whose "
+                "embeddings are missing or out of date are embedded. "
+                "Ids already loaded from workflow files are left to load_workflows_to_postgres. "
+                "Runs as a background job and returns its id."
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "embed": {
+                        "type": "boolean",
+                        "default": True,
+                        "description": "Also embed synced workflows whose embeddings are missing or out of date.",
+                    },
+                    "wait": WAIT_PROPERTY,
+                },
+            },
+        ),
+        types.Tool(
+            name="job_status",
+            description=(
+                "Progress of a background job (items done, rate, ETA) and its result once finished; "
+                "without job_id, list recent jobs. Sends progress notifications while waiting."
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "job_id": {"type": "string"},
+                    "wait": WAIT_PROPERTY,
+                },
+            },
         ),
+        types.Tool(
+            name="cancel_job",
+            description="Cancel a background job; it stops after its current batch, keeping the work committed so far.",
+            inputSchema={
+                "type": "object",
+                "properties": {"job_id": {"type": "string"}},
+                "required": ["job_id"],
+            },
+        ),
+    ]
+
+def _project_workflow(workflow, fields):
+    """Keep only the requested top-level fields; tags are reduced to their names."""
+    projected = {field: workflow.get(field) for field in fields if field in workflow}
+    if isinstance(projected.get("tags"), list):
+        projected["tags"] = [tag.get("name") if isinstance(tag, dict) else tag for tag in projected["tags"]]
+    return projected
+
+def _chunk_workflows(workflows, embedding_client):
+    """{id: (workflow, description chunks, content hash)} for the processed workflows."""
+    chunked = {}
+    for workflow in workflows:
+        chunks = chunk_description(workflow["description"], embedding_client.chunk_tokens)
+        # A single chunk hashes like the whole description did before chunking, so it is not re-embedded
+        text = chunks[0] if len(chunks) == 1 else json.dumps(chunks)
+        chunked[workflow["id"]] = (workflow, chunks, embedding_client.content_hash(text))
+    return chunked
+
+def _group_chunk_embeddings(changed, chunk_embeddings):
+    """Split the flat chunk embeddings per workflow; None for a workflow with any failed chunk."""
+    grouped, position = [], 0
+    for _, chunks, _ in changed:
+        embeddings = chunk_embeddings[position:position + len(chunks)]
+        position += len(chunks)
+        grouped.append(embeddings if all(embeddings) else None)
+    return grouped
+
+def _store_embeddings(changed, embeddings, removed, model):
+    """Write new chunk embeddings and drop stale ones of model in a single transaction.
+
+    Workflows without a row in workflows (not loaded yet) are skipped rather
+    than failing the foreign key and the whole transaction with it. Returns
+    the skipped ids.
+    """
+    postgres_client = get_postgres_client()
+    with postgres_client.transaction():
+        existing = postgres_client.existing_workflow_ids([workflow["id"] for workflow, _, _ in changed])
+        skipped = []
+        for (workflow, _, content_hash), chunk_embeddings in zip(changed, embeddings):
+            if chunk_embeddings and workflow["id"] not in existing:
+                skipped.append(workflow["id"])
+            elif chunk_embeddings:
+                postgres_client.replace_workflow_chunks(workflow["id"], chunk_embeddings, content_hash, model)
+        postgres_client.delete_workflow_embeddings(removed, model)
+    return skipped
+
+def _store_local_embeddings(changed, embeddings, removed):
+    """Apply the same changes to the local vector index and persist it.
+
+    The local index holds one vector per workflow, the mean of its chunk embeddings.
+    """
+    import numpy as np
+
+    local_index = get_local_index()
+    stored = [(workflow["id"], np.mean(chunk_embeddings, axis=0), content_hash)
+              for (workflow, _, content_hash), chunk_embeddings in zip(changed, embeddings) if chunk_embeddings]
+    if stored:
+        ids, vectors, hashes = zip(*stored)
+        local_index.add(ids, vectors, hashes)
+    local_index.remove(removed)
+    local_index.save(local_index_path)
+
+def _search_local_index(query_embedding, top_k, offset=0, fields=None, include_workflow=False):
+    """Search the local vector index, attaching metadata from the processed workflow files."""
+    keys = [SEARCH_FIELDS[field] for field in (fields or DEFAULT_SEARCH_FIELDS) if field in SEARCH_FIELDS]
+    if include_workflow:
+        keys.append("originalWorkflow")
+    results = []
+    for workflow_id, score in get_local_index().search(query_embedding, offset + top_k)[offset:]:
+        hit = {"id": workflow_id}
+        processed_path = OUTPUT_DIR / f"{workflow_id}.json"
+        if processed_path.exists():
+            with open(processed_path, "r", encoding="utf-8") as f:
+                processed = json.load(f)
+            hit.update({key: processed.get(key) for key in keys if key != "id"})
+        hit["score"] = round(score, 6)
+        results.append(hit)
+    return results
+
+async def _fetch_workflows_for_validation(args):
+    """Fetch the requested workflows: by id concurrently, otherwise page by page with filters."""
+    if args.get("workflow_ids"):
+        workflows = await asyncio.gather(*(
+            backends.run("n8n", get_n8n_client().get_workflow, workflow_id) for workflow_id in args["workflow_ids"]
+        ))
+        missing = [workflow_id for workflow_id, workflow in zip(args["workflow_ids"], workflows) if not workflow]
+        return [workflow for workflow in workflows if workflow], missing
+
+    active = args.get("active")
+    filters = {
+        "active": None if active is None else str(bool(active)).lower(),
+        "tags": ",".join(args["tags"]) if args.get("tags") else None,
+        "name": args.get("name"),
+    }
+    workflows, cursor = [], None
+    while True:
+        page = await backends.run("n8n", get_n8n_client().list_workflows_page, MAX_PAGE_SIZE, cursor, **filters)
+        workflows.extend(page["data"])
+        cursor = page["nextCursor"]
+        if not page["data"] or not cursor:
+            return workflows, []
+
+async def _embed_workflows(job, workflows, stored_hashes, removed, use_postgres, local_index):
+    """Embed the workflows whose content hash differs from a stored one and drop the removed ids.
+
+    Embeddings are stored one checkpoint of VECTORIZE_CHECKPOINT_SIZE
+    workflows at a time. The stored content hashes mark what is done, so
+    a job that was cancelled or interrupted resumes after its last
+    checkpoint the next time. Returns the stats.
+    """
+    embedding_client = get_embedding_client()
+    model = embedding_client.model_name
+    current = await backends.run("local", _chunk_workflows, workflows, embedding_client)
+    changed = [
+        entry for workflow_id, entry in current.items()
+        if any(hashes.get(workflow_id) != entry[2] for hashes in stored_hashes)
     ]
 
+    job.start_phase("embed", sum(len(chunks) for _, chunks, _ in changed))
+    # notLoaded: workflows embedded but not stored in PostgreSQL because they have no workflows row yet
+    stats = {"chunks": 0, "total": len(changed), "embedded": 0, "failed": 0, "cacheHits": 0, "batches": 0,
+             "notLoaded": 0}
+    started = time.perf_counter()
+    # range() yields one empty checkpoint when nothing changed, so deletions still happen
+    for offset in range(0, max(1, len(changed)), VECTORIZE_CHECKPOINT_SIZE):
+        checkpoint = changed[offset:offset + VECTORIZE_CHECKPOINT_SIZE]
+        chunk_embeddings, embed_stats = await backends.run(
+            "embedding", embedding_client.embed_all,
+            [chunk for _, chunks, _ in checkpoint for chunk in chunks],
+            on_progress=lambda done, _, base=stats["chunks"]: job.progress(base + done),
+        )
+        embeddings = _group_chunk_embeddings(checkpoint, chunk_embeddings)
+        # Stale embeddings go with the last checkpoint
+        stale = removed if offset + VECTORIZE_CHECKPOINT_SIZE >= len(changed) else []
+        if use_postgres:
+            skipped = await backends.run("postgres", _store_embeddings, checkpoint, embeddings, stale, model)
+            stats["notLoaded"] += len(skipped)
+        if local_index is not None:
+            await backends.run("local", _store_local_embeddings, checkpoint, embeddings, stale)
+        embedded = sum(1 for chunk_vectors in embeddings if chunk_vectors)
+        stats["chunks"] += embed_stats["total"]
+        stats["embedded"] += embedded
+        stats["failed"] += len(checkpoint) - embedded
+        stats["cacheHits"] += embed_stats["cacheHits"]
+        stats["batches"] += embed_stats["batches"]
+        job.progress(stats["chunks"])
+    if use_postgres:
+        await backends.run("postgres", get_postgres_client().ensure_vector_index, model)
+
+    elapsed = time.perf_counter() - started
+    stats.update({
+        "seconds": round(elapsed, 3),
+        "itemsPerSecond": round(stats["chunks"] / elapsed, 2) if elapsed > 0 else None,
+        "unchanged": len(current) - len(changed),
+        "deleted": len(removed),
+    })
+    return stats
+
+async def _vectorize_workflows(job, use_postgres, local_index):
+    """Job of vectorize_workflows: embed new and changed workflow files."""
+    job.start_phase("parse")
+    processed_workflows = await backends.run("local", process_all_workflows, on_progress=job.progress)
+    model = get_embedding_client().model_name
+    stored_hashes = []
+    synced = set()
+    if use_postgres:
+        await backends.run("postgres", get_postgres_client().create_workflows_table)
+        stored_hashes.append(await backends.run("postgres", get_postgres_client().get_embedding_hashes, model))
+        # Workflows kept in sync with n8n by sync_workflows are neither embedded from files nor removed
+        synced = set(await backends.run("postgres", get_postgres_client().get_workflow_versions, "n8n"))
+        processed_workflows = [workflow for workflow in processed_workflows if workflow["id"] not in synced]
+    if local_index is not None:
+        stored_hashes.append(local_index.content_hashes)
+    current_ids = {workflow["id"] for workflow in processed_workflows}
+    removed = sorted({workflow_id for hashes in stored_hashes for workflow_id in hashes
+                      if workflow_id not in current_ids and workflow_id not in synced})
+
+    stats = await _embed_workflows(job, processed_workflows, stored_hashes, removed, use_postgres, local_index)
+    return {
+        "status": "success",
+        "message": (
+            f"Vectorized {stats['embedded']} new or changed workflows, "
+            f"{stats['unchanged']} unchanged, {stats['deleted']} deleted."
+            + (f" {stats['notLoaded']} are not in PostgreSQL yet; run load_workflows_to_postgres first."
+               if stats["notLoaded"] else "")
+        ),
+        "stats": stats,
+    }
+
+async def _load_workflows(job):
+    """Job of load_workflows_to_postgres; each batch of rows is committed as it is written."""
+    await backends.run("postgres", get_postgres_client().create_workflows_table)
+    job.start_phase("parse")
+    workflows = await backends.run("local", process_all_workflows, on_progress=job.progress)
+    # Rows synced from n8n keep their n8n content even when a file has the same id
+    synced = set(await backends.run("postgres", get_postgres_client().get_workflow_versions, "n8n"))
+    files = [workflow for workflow in workflows if workflow["id"] not in synced]
+    job.start_phase("upsert", len(files))
+    stats = await backends.run(
+        "postgres", get_postgres_client().bulk_upsert_workflows, files, LOAD_BATCH_SIZE, job.progress
+    )
+    stats["ownedByN8n"] = len(workflows) - len(files)
+    return {
+        "status": "success",
+        "message": (
+            f"Loaded {stats['rows']} workflows into PostgreSQL ({stats['written']} inserted or updated)."
+            + (f" Skipped {stats['ownedByN8n']} whose ids are synced from n8n." if stats["ownedByN8n"] else "")
+        ),
+        "stats": stats,
+    }
+
+async def _sync_workflows(job, embed):
+    """Job of sync_workflows: mirror the workflows changed in n8n since the last sync into PostgreSQL."""
+    postgres_client = get_postgres_client()
+    await backends.run("postgres", postgres_client.create_workflows_table)
+    state = await backends.run("postgres", postgres_client.get_sync_state)
+    high_water_mark = state["highWaterMark"] if state else None
+    stored_versions = await backends.run("postgres", postgres_client.get_workflow_versions)
+    # Ids already stored from workflow files belong to load_workflows_to_postgres
+    file_ids = set(await backends.run("postgres", postgres_client.get_workflow_versions, "file"))
+
+    job.start_phase("fetch")
+    changed, seen, newest = await backends.run(
+        "n8n", fetch_changed_workflows, get_n8n_client(), stored_versions, high_water_mark, job.progress, file_ids
+    )
+    deleted = sorted(set(stored_versions) - seen)
+    job.start_phase("upsert", len(changed))
+    upsert_stats = await backends.run(
+        "postgres", postgres_client.bulk_upsert_workflows, changed, LOAD_BATCH_SIZE, job.progress
+    )
+    # Their embeddings go with them through the foreign key
+    await backends.run("postgres", postgres_client.delete_workflows, deleted)
+
+    owned_by_files = len(seen & file_ids)
+    stats = {
+        "listed": len(seen),
+        "changed": len(changed),
+        "written": upsert_stats["written"],
+        "unchanged": len(seen) - len(changed) - owned_by_files,
+        "deleted": len(deleted),
+        "ownedByFiles": owned_by_files,
+    }
+    if embed:
+        # Every n8n row is checked against its stored embedding hash, not just the changed ones, so
+        # embeddings that failed before or were skipped with embed=false are filled in
+        synced = await backends.run("postgres", postgres_client.get_workflow_descriptions)
+        stored_hashes = await backends.run(
+            "postgres", postgres_client.get_embedding_hashes, get_embedding_client().model_name
+        )
+        stats["embeddings"] = await _embed_workflows(job, synced, [stored_hashes], [], True, None)
+        if stats["embeddings"]["failed"]:
+            stats["highWaterMark"] = high_water_mark.isoformat() if high_water_mark else None
+            return {
+                "status": "error",
+                "message": (
+                    f"Synced {stats['listed']} n8n workflows, but {stats['embeddings']['failed']} could not be "
+                    "embedded. The sync position was kept; run sync_workflows again to retry them."
+                ),
+                "stats": stats,
+            }
+    # Only a completed sync moves the mark, so the next one redoes whatever this one did not finish
+    await backends.run("postgres", postgres_client.set_sync_state, newest, stats)
+    stats["highWaterMark"] = newest.isoformat() if newest else None
+    return {
+        "status": "success",
+        "message": (
+            f"Synced {stats['listed']} n8n workflows: {stats['changed']} new or changed, "
+            f"{stats['deleted']} deleted."
+        ),
+        "stats": stats,
+    }
+
+async def _wait_for_job(job, wait):
+    """Wait up to wait seconds for job to finish, sending progress notifications if the caller asked for them."""
+    deadline = time.monotonic() + min(max(0.0, float(wait or 0)), MAX_JOB_WAIT)
+    context, token = None, None
+    try:
+        context = server.request_context
+        token = context.meta.progressToken if context.meta else None
+    except LookupError:
+        pass
+    last = (None, -1)
+    while not job.finished and deadline > time.monotonic():
+        await jobs.wait(job, min(JOB_POLL_INTERVAL, deadline - time.monotonic()))
+        # Only report when the count moved; within a phase it only grows
+        if token is not None and not job.finished and (job.phase, job.done) != last:
+            last = (job.phase, job.done)
+            await context.session.send_progress_notification(
+                token, job.done, job.total, message=f"{job.kind}: {job.phase}", related_request_id=context.request_id
+            )
+
+async def _job_response(job, wait):
+    """The job's result if it succeeds within wait seconds, otherwise its status."""
+    await _wait_for_job(job, wait)
+    if job.status == "succeeded":
+        return {**job.result, "jobId": job.id}
+    if job.status == "failed":
+        return {"status": "error", "message": f"Job {job.id} failed: {job.error}", "jobId": job.id}
+    return {
+        "status": job.status,
+        "message": f"Job {job.id} is {job.status}; call job_status to follow its progress.",
+        "job": job.to_dict(),
+    }
+
+@server.list_resources()
+async def handle_list_resources() -> list[types.Resource]:
+    """List the metrics resources."""
+    return [
+        types.Resource(
+            uri=AnyUrl(METRICS_URI),
+            name="Server metrics",
+            description="Per-tool latency, backend call latency and errors, and cache hit rates.",
+            mimeType="application/json",
+        ),
+        types.Resource(
+            uri=AnyUrl(PROMETHEUS_URI),
+            name="Server metrics (Prometheus)",
+            description="The same metrics in the Prometheus text exposition format.",
+            mimeType="text/plain",
+        ),
+    ]
+
+@server.read_resource()
+async def handle_read_resource(uri: AnyUrl) -> list[ReadResourceContents]:
+    """Read a metrics resource."""
+    if str(uri) == METRICS_URI:
+        return [ReadResourceContents(content=json.dumps(metrics.snapshot(), indent=2), mime_type="application/json")]
+    if str(uri) == PROMETHEUS_URI:
+        return [ReadResourceContents(content=metrics.prometheus_text(), mime_type="text/plain")]
+    raise ValueError(f"Unknown resource: {uri}")
+
 @server.call_tool()
 async def handle_call_tool(
     name: str, arguments: dict | None
 ) -> list[types.TextContent | types.ImageContent | types.EmbeddedResource]:
-    """Handle tool execution requests."""
-    args = arguments or {}
+    """Handle tool execution requests, recording their latency and errors."""
+    global _tool_names
+    if _tool_names is None:
+        _tool_names = {tool.name for tool in await handle_list_tools()}
+    # Unknown names share one label, so clients cannot create a series per name they send
+    metric_name = name if name in _tool_names else "unknown"
+    started = time.perf_counter()
+    failed = True
+    try:
+        result = await _run_tool(name, arguments or {})
+        failed = isinstance(result, dict) and result.get("status") == "error"
+    finally:
+        metrics.observe_tool(metric_name, time.perf_counter() - started, error=failed)
+        prometheus_file.maybe_write()
+
+    if name in COMPACT_TOOLS:
+        return [types.TextContent(type="text", text=json.dumps(result, separators=(",", ":")))]
+    return [types.TextContent(type="text", text=json.dumps(result, indent=2))]
+
+async def _run_tool(name: str, args: dict):
     if name == "list_workflows":
-        result = n8n_client.get_workflows()
+        active = args.get("active")
+        try:
+            page = await backends.run(
+                "n8n", get_n8n_client().list_workflows_page,
+                max(1, int(args.get("limit", 50))),
+                args.get("cursor"),
+                active=None if active is None else str(bool(active)).lower(),
+                tags=",".join(args["tags"]) if args.get("tags") else None,
+                name=args.get("name"),
+            )
+            fields = args.get("fields") or DEFAULT_LIST_FIELDS
+            result = {
+                "data": [_project_workflow(workflow, fields) for workflow in page["data"]],
+                "nextCursor": page["nextCursor"],
+            }
+        except (requests.exceptions.RequestException, ValueError) as e:
+            result = {"status": "error", "message": f"Could not list workflows: {e}"}
     elif name == "get_workflow":
-        result = n8n_client.get_workflow(args.get("workflow_id"))
+        result = await backends.run("n8n", get_n8n_client().get_workflow, args.get("workflow_id"))
     elif name == "create_workflow":
-        result = n8n_client.create_workflow(args.get("workflow_data"))
+        result = await backends.run("n8n", get_n8n_client().create_workflow, args.get("workflow_data"))
     elif name == "edit_workflow":
-        result = n8n_client.update_workflow(args.get("workflow_id"), args.get("workflow_data"))
+        result = await backends.run(
+            "n8n", get_n8n_client().update_workflow, args.get("workflow_id"), args.get("workflow_data")
+        )
+    elif name == "import_workflows":
+        try:
+            stats = await backends.run(
+                "local", import_workflows, get_n8n_client(), args["path"],
+                checkpoint_path=args.get("checkpoint"),
+                concurrency=args.get("concurrency"),
+                rate=args.get("rate"),
+                match_existing=bool(args.get("match_existing")),
+            )
+            result = {"status": "success", "stats": stats}
+        except Exception as e:
+            result = {"status": "error", "message": f"Import failed: {e}"}
+        finally:
+            get_n8n_client().invalidate()
     elif name == "validate_workflow":
-        workflow = n8n_client.get_workflow(args.get("workflow_id"))
+        workflow = await backends.run("n8n", get_n8n_client().get_workflow, args.get("workflow_id"))
         if workflow:
-            result = validate_workflow(workflow, args.get("options"))
+            result = await backends.run("local", validate_workflow, workflow, args.get("options"))
         else:
             result = {"status": "error", "message": f"Workflow with ID {args.get('workflow_id')} not found."}
+    elif name == "validate_all_workflows":
+        try:
+            workflows, missing = await _fetch_workflows_for_validation(args)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            workflows, result = None, {"status": "error", "message": f"Could not list workflows: {e}"}
+        if workflows is not None:
+            results, stats = await backends.run(
+                "local", validate_workflows, workflows, args.get("options"), validation_cache
+            )
+            result = summarize_validation(results, bool(args.get("include_passed")))
+            result.update({"notFound": missing, "stats": stats})
     elif name == "vectorize_workflows":
-        processed_workflows = process_all_workflows()
-        postgres_client.connect()
-        if not postgres_client.connection:
+        use_postgres = await backends.run("postgres", get_postgres_client().connect)
+        local_index = await backends.run("local", get_local_index)
+        if not use_postgres and local_index is None:
             result = {"status": "error", "message": "Could not connect to PostgreSQL."}
         else:
-            for workflow in processed_workflows:
-                embedding = embedding_client.get_embedding(workflow["description"])
-                if embedding:
-                    postgres_client.insert_workflow_embedding(workflow["id"], embedding)
-            postgres_client.disconnect()
-            result = {"status": "success", "message": f"Vectorized {len(processed_workflows)} workflows."}
+            job = jobs.active(name) or jobs.submit(
+                name, {}, lambda job: _vectorize_workflows(job, use_postgres, local_index)
+            )
+            result = await _job_response(job, args.get("wait"))
     elif name == "search_similar_workflows":
-        query_embedding = embedding_client.get_embedding(args.get("query"))
-        if query_embedding:
-            postgres_client.connect()
-            if not postgres_client.connection:
-                result = {"status": "error", "message": "Could not connect to PostgreSQL."}
-            else:
-                result = postgres_client.search_similar_workflows(query_embedding, args.get("top_k", 5))
-                postgres_client.disconnect()
+        mode = args.get("mode", "hybrid")
+        query_embedding = None
+        if mode != "keyword":
+            query_embedding = await backends.run("embedding", get_embedding_client().get_embedding, args.get("query"))
+            if not query_embedding and mode == "hybrid":
+                # Without an embedding, hybrid search still has its full-text half
+                mode = "keyword"
+        top_k = max(1, int(args.get("top_k", 5)))
+        offset = int(args["cursor"]) if args.get("cursor") else 0
+        hits = None
+        if mode == "vector" and not query_embedding:
+            hits = []
+        elif await backends.run("postgres", get_postgres_client().connect):
+            hits = await backends.run(
+                "postgres", get_postgres_client().hybrid_search_workflows,
+                args.get("query"), query_embedding, top_k, mode,
+                {key: args.get(key) for key in ("category", "complexity", "tags")},
+                args.get("recall", "balanced"),
+                offset=offset, fields=args.get("fields"), include_workflow=bool(args.get("include_workflow")),
+                model=get_embedding_client().model_name, pooling=args.get("pooling", "max"),
+            )
+        elif query_embedding and await backends.run("local", get_local_index) is not None:
+            hits = await backends.run(
+                "local", _search_local_index, query_embedding, top_k,
+                offset, args.get("fields"), bool(args.get("include_workflow")),
+            )
+        if hits is None:
+            result = {"status": "error", "message": "Could not connect to PostgreSQL."}
         else:
-            result = []
+            # The cursor is the offset of the next page; a short page means there is none
+            result = {"data": hits, "nextCursor": str(offset + top_k) if len(hits) == top_k else None}
     elif name == "load_workflows_to_postgres":
-        postgres_client.connect()
-        if not postgres_client.connection:
+        if not await backends.run("postgres", get_postgres_client().connect):
+            result = {"status": "error", "message": "Could not connect to PostgreSQL."}
+        else:
+            job = jobs.active(name) or jobs.submit(name, {}, _load_workflows)
+            result = await _job_response(job, args.get("wait"))
+    elif name == "rebuild_vector_index":
+        if not await backends.run("postgres", get_postgres_client().connect):
             result = {"status": "error", "message": "Could not connect to PostgreSQL."}
         else:
-            postgres_client.create_workflows_table()
-            workflows = process_all_workflows()
-            for workflow in workflows:
-                postgres_client.insert_workflow(workflow)
-            postgres_client.disconnect()
-            result = {"status": "success", "message": f"Loaded {len(workflows)} workflows into PostgreSQL."}
+            model = args.get("model") or get_embedding_client().model_name
+            try:
+                index = await backends.run(
+                    "postgres", get_postgres_client().create_vector_index,
+                    model=model,
+                    method=args.get("method"),
+                    metric=args.get("metric"),
+                    quantization=args.get("quantization"),
+                    m=args.get("m", 16),
+                    ef_construction=args.get("ef_construction", 64),
+                    lists=args.get("lists"),
+                    rebuild=True,
+                )
+                models = await backends.run("postgres", get_postgres_client().embedding_models)
+                if index is None:
+                    result = {"status": "error", "message": f"No embeddings stored for model {model}.", "models": models}
+                else:
+                    result = {"status": "success", "index": index, "models": models}
+            except Exception as e:
+                result = {"status": "error", "message": f"Index rebuild failed: {e}"}
+    elif name == "sync_workflows":
+        if not await backends.run("postgres", get_postgres_client().connect):
+            result = {"status": "error", "message": "Could not connect to PostgreSQL."}
+        else:
+            embed = args.get("embed", True)
+            job = jobs.active(name) or jobs.submit(name, {"embed": embed}, lambda job: _sync_workflows(job, embed))
+            result = await _job_response(job, args.get("wait"))
+    elif name == "job_status":
+        if args.get("job_id"):
+            job = jobs.get(args["job_id"])
+            if job is None:
+                result = {"status": "error", "message": f"Job {args['job_id']} not found."}
+            else:
+                await _wait_for_job(job, args.get("wait"))
+                result = job.to_dict()
+        else:
+            result = {"jobs": [
+                {key: value for key, value in job.to_dict().items() if key != "result"}
+                for job in reversed(jobs.jobs.values())
+            ]}
+    elif name == "cancel_job":
+        job = jobs.cancel(args.get("job_id"))
+        if job is None:
+            result = {"status": "error", "message": f"Job {args.get('job_id')} not found."}
+        else:
+            result = job.to_dict()
     else:
         raise ValueError(f"Unknown tool: {name}")
-
-    return [types.TextContent(type="text", text=json.dumps(result, indent=2))]
+    return result
 
 async def main():
     """Run the server using stdin/stdout streams."""
-    async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
-        await server.run(
-            read_stream,
-            write_stream,
-            InitializationOptions(
-                server_name="n8n-mcp",
-                server_version="0.1.0",
-                capabilities=server.get_capabilities(
-                    notification_options=NotificationOptions(),
-                    experimental_capabilities={},
+    # stdout carries the MCP protocol, so diagnostics are logged to stderr
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr, format="%(levelname)s %(name)s: %(message)s")
+    try:
+        async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
+            await server.run(
+                read_stream,
+                write_stream,
+                InitializationOptions(
+                    server_name="n8n-mcp",
+                    server_version="0.1.0",
+                    capabilities=server.get_capabilities(
+                        notification_options=NotificationOptions(),
+                        experimental_capabilities={},
+                    ),
                 ),
-            ),
-        )
+            )
+    finally:
+        # Unfinished jobs stop at their next checkpoint and are resumed by running their tool again
+        await jobs.shutdown()
+        prometheus_file.maybe_write(force=True)
+        backends.shutdown()
+        if _postgres_client is not None:
+            _postgres_client.disconnect()
 
 if __name__ == "__main__":
     asyncio.run(main())
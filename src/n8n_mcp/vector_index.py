@@ -0,0 +1,144 @@
+import os
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+
+class VectorIndex:
+    """In-process cosine similarity index over workflow embeddings.
+
+    Embeddings are kept L2-normalized in one contiguous float32 matrix, so a
+    query is a single matrix-vector product followed by argpartition for the
+    top k. The index persists as ``<path>.npy`` (loaded memory-mapped) plus
+    ``<path>.ids.json`` holding the row ids, their content hashes and the
+    name of the embedding model the vectors came from.
+    """
+
+    def __init__(self, dimension: Optional[int] = None, model: Optional[str] = None):
+        self.dimension = dimension
+        self.model = model
+        self.ids: List[str] = []
+        self.content_hashes: Dict[str, str] = {}
+        self._positions: Dict[str, int] = {}
+        self._matrix = np.empty((0, dimension or 0), dtype=np.float32)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def _as_matrix(self, embeddings) -> np.ndarray:
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix.reshape(1, -1)
+        if self.dimension is None:
+            self.dimension = matrix.shape[1]
+            self._matrix = self._matrix.reshape(0, self.dimension)
+        if matrix.shape[1] != self.dimension:
+            raise ValueError(f"Expected embeddings of dimension {self.dimension}, got {matrix.shape[1]}")
+        return self._normalize(matrix)
+
+    def add(self, ids: Sequence[str], embeddings, content_hashes: Optional[Sequence[str]] = None):
+        """Insert or replace embeddings by id."""
+        if not len(ids):
+            return
+        with self._lock:
+            vectors = self._as_matrix(embeddings)
+            matrix = self._matrix if self._matrix.flags.writeable else np.array(self._matrix)
+            new_ids, new_rows = [], []
+            for row, workflow_id in enumerate(ids):
+                position = self._positions.get(workflow_id)
+                if position is None:
+                    self._positions[workflow_id] = len(self.ids) + len(new_ids)
+                    new_ids.append(workflow_id)
+                    new_rows.append(row)
+                elif position >= len(self.ids):
+                    # Repeated id within this call: the last occurrence wins.
+                    new_rows[position - len(self.ids)] = row
+                else:
+                    matrix[position] = vectors[row]
+            if new_rows:
+                matrix = np.concatenate([matrix, vectors[new_rows]])
+            self._matrix = np.ascontiguousarray(matrix)
+            self.ids.extend(new_ids)
+            if content_hashes is not None:
+                self.content_hashes.update(zip(ids, content_hashes))
+
+    def remove(self, ids: Iterable[str]):
+        with self._lock:
+            drop = {self._positions[i] for i in ids if i in self._positions}
+            if not drop:
+                return
+            keep = [position for position in range(len(self.ids)) if position not in drop]
+            self._matrix = np.ascontiguousarray(self._matrix[keep])
+            self.ids = [self.ids[position] for position in keep]
+            self._positions = {workflow_id: position for position, workflow_id in enumerate(self.ids)}
+            self.content_hashes = {i: h for i, h in self.content_hashes.items() if i in self._positions}
+
+    def search_batch(self, queries, top_k: int = 5) -> List[List[Tuple[str, float]]]:
+        """Top-k (id, cosine similarity) pairs for each query, best first."""
+        matrix, ids = self._matrix, self.ids
+        queries = self._as_matrix(queries)
+        if not ids or top_k <= 0:
+            return [[] for _ in range(len(queries))]
+        k = min(top_k, len(ids))
+        scores = queries @ matrix.T
+        if k < len(ids):
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(len(ids)), scores.shape)
+        order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        return [
+            [(ids[j], float(scores[row, j])) for j in columns]
+            for row, columns in enumerate(top)
+        ]
+
+    def search(self, query, top_k: int = 5) -> List[Tuple[str, float]]:
+        return self.search_batch([query], top_k)[0]
+
+    @staticmethod
+    def _paths(path) -> Tuple[Path, Path]:
+        base = Path(path)
+        if base.suffix == ".npy":
+            base = base.with_suffix("")
+        return base.with_name(base.name + ".npy"), base.with_name(base.name + ".ids.json")
+
+    def save(self, path):
+        """Write the matrix and id file, replacing any previous copy atomically."""
+        matrix_path, ids_path = self._paths(path)
+        matrix_path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            matrix, ids, hashes = self._matrix, list(self.ids), dict(self.content_hashes)
+        tmp_matrix = matrix_path.with_name(matrix_path.name + ".tmp")
+        with open(tmp_matrix, "wb") as f:
+            np.save(f, matrix)
+        tmp_ids = ids_path.with_name(ids_path.name + ".tmp")
+        with open(tmp_ids, "w", encoding="utf-8") as f:
+            json.dump({"dimension": self.dimension, "model": self.model, "ids": ids, "contentHashes": hashes}, f)
+        os.replace(tmp_matrix, matrix_path)
+        os.replace(tmp_ids, ids_path)
+
+    @classmethod
+    def load(cls, path, mmap: bool = True) -> "VectorIndex":
+        matrix_path, ids_path = cls._paths(path)
+        with open(ids_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        index = cls(meta.get("dimension"), meta.get("model"))
+        index._matrix = np.load(matrix_path, mmap_mode="r" if mmap else None)
+        index.ids = meta["ids"]
+        index.content_hashes = meta.get("contentHashes", {})
+        index._positions = {workflow_id: position for position, workflow_id in enumerate(index.ids)}
+        if len(index.ids) != index._matrix.shape[0]:
+            raise ValueError(f"Index at {path} has {index._matrix.shape[0]} vectors but {len(index.ids)} ids")
+        return index
+
+    @classmethod
+    def exists(cls, path) -> bool:
+        return all(p.exists() for p in cls._paths(path))
@@ -0,0 +1,181 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Set, Tuple
+
+def workflow_version(workflow: Dict[str, Any]) -> Optional[str]:
+    """Identity of a workflow revision: versionId when n8n provides it, else updatedAt."""
+    if not isinstance(workflow, dict):
+        return None
+    return workflow.get("versionId") or workflow.get("updatedAt")
+
+class TTLCache:
+    """Size-bounded LRU mapping whose entries expire after ttl seconds."""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, float, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def lookup(self, key: Hashable) -> Tuple[Optional[Any], Optional[float], bool]:
+        """Return (value, stored_at, fresh) for key, or (None, None, False) when absent."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None, None, False
+        self._entries.move_to_end(key)
+        stored_at, expires_at, value = entry
+        return value, stored_at, time.monotonic() < expires_at
+
+    def set(self, key: Hashable, value: Any, stored_at: Optional[float] = None):
+        now = time.monotonic()
+        self._entries[key] = (stored_at if stored_at is not None else now, now + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+class CachedN8nApiClient:
+    """Caching front for N8nApiClient with the same public methods.
+
+    Single workflows and list results are cached for N8N_CACHE_TTL seconds,
+    in at most N8N_CACHE_MAX_ENTRIES entries. Listings are fetched without
+    pinData, so they never create single-workflow entries; they only extend
+    the TTL of cached workflows whose version (versionId or updatedAt) is
+    unchanged, and drop those whose version changed. Workflows missing from
+    a new listing are dropped. Creating or updating a workflow invalidates the
+    cached lists, and an update stores the returned revision. A fetch that
+    fails raises through the cache and leaves the cached entries as they were,
+    so an n8n outage is never remembered as an empty workflow list.
+    """
+
+    def __init__(self, client, ttl: Optional[float] = None, max_entries: Optional[int] = None):
+        self.client = client
+        ttl = float(os.getenv("N8N_CACHE_TTL", "30")) if ttl is None else ttl
+        max_entries = int(os.getenv("N8N_CACHE_MAX_ENTRIES", "1000")) if max_entries is None else max_entries
+        self.enabled = ttl > 0 and max_entries > 0
+        self._workflows = TTLCache(ttl, max_entries)
+        self._lists = TTLCache(ttl, 32)
+        self._listed_ids: Set[str] = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+
+    def __getattr__(self, name):
+        # Anything not cached here goes straight to the wrapped client.
+        return getattr(self.client, name)
+
+    def _record_listing(self, workflows, fetched_at: float):
+        """Revalidate cached single workflows against a listing.
+
+        Listed bodies lack pinData, so they are never stored in place of a
+        full GET: an unchanged revision has its TTL extended and a changed
+        one is dropped, to be fetched again on the next get_workflow.
+        """
+        for workflow in workflows:
+            if not isinstance(workflow, dict) or not workflow.get("id"):
+                continue
+            cached, _, _ = self._workflows.lookup(workflow["id"])
+            if cached is None:
+                continue
+            version = workflow_version(workflow)
+            if version is not None and workflow_version(cached) == version:
+                self.revalidations += 1
+                self._workflows.set(workflow["id"], cached, fetched_at)
+            else:
+                self._workflows.pop(workflow["id"])
+
+    def get_workflows(self):
+        if not self.enabled:
+            return self.client.get_workflows()
+        with self._lock:
+            workflows, _, fresh = self._lists.lookup("all")
+            if fresh:
+                self.hits += 1
+                return workflows
+        self.misses += 1
+        fetched_at = time.monotonic()
+        workflows = self.client.get_workflows()
+        with self._lock:
+            self._lists.set("all", workflows, fetched_at)
+            self._record_listing(workflows, fetched_at)
+            listed_ids = {w["id"] for w in workflows if isinstance(w, dict) and w.get("id")}
+            for deleted_id in self._listed_ids - listed_ids:
+                self._workflows.pop(deleted_id)
+            self._listed_ids = listed_ids
+        return workflows
+
+    def list_workflows_page(self, limit=50, cursor=None, **filters):
+        if not self.enabled:
+            return self.client.list_workflows_page(limit, cursor, **filters)
+        key = ("page", limit, cursor, tuple(sorted(filters.items())))
+        with self._lock:
+            page, _, fresh = self._lists.lookup(key)
+            if fresh:
+                self.hits += 1
+                return page
+        self.misses += 1
+        fetched_at = time.monotonic()
+        page = self.client.list_workflows_page(limit, cursor, **filters)
+        with self._lock:
+            self._lists.set(key, page, fetched_at)
+            self._record_listing(page["data"], fetched_at)
+        return page
+
+    def get_workflow(self, workflow_id: str):
+        if not self.enabled:
+            return self.client.get_workflow(workflow_id)
+        with self._lock:
+            workflow, _, fresh = self._workflows.lookup(workflow_id)
+            if fresh:
+                self.hits += 1
+                return workflow
+        self.misses += 1
+        fetched_at = time.monotonic()
+        workflow = self.client.get_workflow(workflow_id)
+        if workflow is not None:
+            with self._lock:
+                self._workflows.set(workflow_id, workflow, fetched_at)
+        return workflow
+
+    def invalidate(self, workflow_id: Optional[str] = None):
+        """Drop cached lists, and the given workflow (or every workflow when None)."""
+        with self._lock:
+            self._lists.clear()
+            if workflow_id is None:
+                self._workflows.clear()
+            else:
+                self._workflows.pop(workflow_id)
+
+    def create_workflow(self, workflow_data):
+        created = self.client.create_workflow(workflow_data)
+        with self._lock:
+            self._lists.clear()
+        return created
+
+    def update_workflow(self, workflow_id: str, workflow_data: dict):
+        updated = self.client.update_workflow(workflow_id, workflow_data)
+        self.invalidate(workflow_id)
+        if isinstance(updated, dict) and updated.get("id") == workflow_id:
+            with self._lock:
+                self._workflows.set(workflow_id, updated)
+        return updated
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "cachedWorkflows": len(self._workflows),
+        }
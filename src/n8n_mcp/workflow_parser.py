@@ -1,12 +1,36 @@
+import re
 import json
 import os
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
 
 # Configuration
 WORKFLOWS_DIR = Path(__file__).parent.parent.parent / "workflows"
 OUTPUT_DIR = Path(__file__).parent.parent.parent / "processed-workflows"
 
+# Directories with fewer files than this are parsed serially. Spawning the pool
+# costs about 0.3-0.6s and sending each result back about a third of its parse
+# time, so 4 workers only break even at roughly 1000-4500 files.
+PARALLEL_MIN_FILES = 5000
+
+# Default size of the description chunks embedded separately, in approximate tokens
+DESCRIPTION_CHUNK_TOKENS = 256
+# Approximates model tokens as words and single punctuation marks
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+STICKY_NOTE_TYPE = "n8n-nodes-base.stickyNote"
+SERVICE_TAGS = (
+    "gmail", "google", "openai", "langchain", "webhook",
+    "http", "database", "postgres", "supabase",
+)
+
 # Ensure output directory exists
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
@@ -32,97 +56,161 @@ def get_node_type_str(node: Dict[str, Any]) -> Optional[str]:
             return str(node_type)
     return node_type
 
-def generate_description(workflow: Dict[str, Any]) -> str:
+@dataclass
+class WorkflowFeatures:
+    """Everything the description, tags and complexity need, gathered in one pass over the nodes."""
+    node_count: int = 0
+    type_counts: Dict[str, int] = field(default_factory=dict)
+    node_names: Set[str] = field(default_factory=set)
+    sticky_notes: List[str] = field(default_factory=list)
+    tags: Set[str] = field(default_factory=set)
+    connection_count: int = 0
+
+@lru_cache(maxsize=4096)
+def _node_type_tags(node_type: str) -> Tuple[str, ...]:
+    """Tags implied by a node type: its base name plus any known service it mentions."""
+    tags = [service for service in SERVICE_TAGS if service in node_type]
+    base_type = node_type.split(".")[-1]
+    if base_type:
+        tags.append(base_type)
+    return tuple(tags)
+
+def extract_features(workflow: Dict[str, Any]) -> WorkflowFeatures:
+    """Walk the workflow's nodes and connections once and collect its features."""
+    features = WorkflowFeatures()
+
+    if isinstance(workflow.get("tags"), list):
+        for tag in workflow["tags"]:
+            if isinstance(tag, dict) and "name" in tag:
+                features.tags.add(tag["name"])
+            elif isinstance(tag, str):
+                features.tags.add(tag)
+
+    nodes = workflow.get("nodes")
+    if isinstance(nodes, list):
+        features.node_count = len(nodes)
+        type_counts = features.type_counts
+        for node in nodes:
+            node_type = get_node_type_str(node)
+            if node_type:
+                type_counts[node_type] = type_counts.get(node_type, 0) + 1
+            if node.get("name"):
+                features.node_names.add(node["name"])
+            if node.get("type") == STICKY_NOTE_TYPE:
+                content = (node.get("parameters") or {}).get("content")
+                if content:
+                    features.sticky_notes.append(content)
+        for node_type in type_counts:
+            features.tags.update(_node_type_tags(node_type))
+
+    if isinstance(workflow.get("connections"), dict):
+        for conn in workflow["connections"].values():
+            if isinstance(conn, dict) and isinstance(conn.get("main"), list):
+                for main_conn in conn["main"]:
+                    if isinstance(main_conn, list):
+                        features.connection_count += len(main_conn)
+
+    return features
+
+def generate_description(workflow: Dict[str, Any], features: Optional[WorkflowFeatures] = None) -> str:
     """Generate a description for a workflow based on its content."""
+    if features is None:
+        features = extract_features(workflow)
     description = []
     
     if workflow.get("name"):
         description.append(f"Workflow Name: {workflow['name']}\n")
     
-    node_types: Dict[str, int] = {}
-    node_names: Set[str] = set()
-    
-    if isinstance(workflow.get("nodes"), list):
-        for node in workflow["nodes"]:
-            node_type = get_node_type_str(node)
-            if node_type:
-                node_types[node_type] = node_types.get(node_type, 0) + 1
-            if node.get("name"):
-                node_names.add(node["name"])
-    
-    if node_types:
+    if features.type_counts:
         description.append("Node Types:")
-        for type, count in node_types.items():
+        for type, count in features.type_counts.items():
             description.append(f"- {type}: {count}")
     
-    if node_names:
+    if features.node_names:
         description.append("\nNode Names:")
-        for name in sorted(list(node_names)):
+        for name in sorted(features.node_names):
             description.append(f"- {name}")
             
-    sticky_notes = [
-        node for node in workflow.get("nodes", []) if node.get("type") == "n8n-nodes-base.stickyNote"
-    ]
-    if sticky_notes:
+    if features.sticky_notes:
         description.append("\nWorkflow Documentation:")
-        for note in sticky_notes:
-            if note.get("parameters", {}).get("content"):
-                description.append(note["parameters"]["content"])
+        description.extend(features.sticky_notes)
                 
     return "\n".join(description)
 
-def extract_tags(workflow: Dict[str, Any]) -> List[str]:
+def count_tokens(text: str) -> int:
+    """Approximate token count of text; see TOKEN_PATTERN."""
+    return len(TOKEN_PATTERN.findall(text))
+
+def _split_long_line(line: str, max_tokens: int) -> List[str]:
+    """Split one line at word boundaries into pieces of at most max_tokens."""
+    pieces, words, tokens = [], [], 0
+    for word in line.split():
+        word_tokens = count_tokens(word)
+        if words and tokens + word_tokens > max_tokens:
+            pieces.append(" ".join(words))
+            words, tokens = [], 0
+        words.append(word)
+        tokens += word_tokens
+    if words:
+        pieces.append(" ".join(words))
+    return pieces
+
+def chunk_description(description: str, max_tokens: int = DESCRIPTION_CHUNK_TOKENS) -> List[str]:
+    """Split a description into chunks of at most max_tokens approximate tokens.
+
+    Paragraphs are packed whole into chunks when they fit. Longer ones are
+    split at line breaks, and lines at word boundaries. Every chunk after
+    the first starts with the "Workflow Name:" line, so it still names the
+    workflow it documents.
+    """
+    lines = description.split("\n")
+    header = lines[0] if lines and lines[0].startswith("Workflow Name:") else ""
+    header_tokens = count_tokens(header)
+    budget = max(1, max_tokens - header_tokens)
+
+    pieces = []
+    for paragraph in description.split("\n\n"):
+        if not paragraph.strip():
+            continue
+        if count_tokens(paragraph) <= budget:
+            pieces.append(paragraph)
+            continue
+        for line in paragraph.split("\n"):
+            if count_tokens(line) <= budget:
+                pieces.append(line)
+            else:
+                pieces.extend(_split_long_line(line, budget))
+
+    chunks, current, tokens = [], [], 0
+    for piece in pieces:
+        piece_tokens = count_tokens(piece)
+        if current and tokens + piece_tokens > budget:
+            chunks.append("\n".join(current))
+            current, tokens = [], 0
+        current.append(piece)
+        tokens += piece_tokens
+    if current:
+        chunks.append("\n".join(current))
+    if header:
+        chunks[1:] = [f"{header}\n{chunk}" for chunk in chunks[1:]]
+    return chunks or [description]
+
+def extract_tags(workflow: Dict[str, Any], features: Optional[WorkflowFeatures] = None) -> List[str]:
     """Extract tags from a workflow."""
-    tags: Set[str] = set()
-    
-    if isinstance(workflow.get("tags"), list):
-        for tag in workflow["tags"]:
-            if isinstance(tag, dict) and "name" in tag:
-                tags.add(tag["name"])
-            elif isinstance(tag, str):
-                tags.add(tag)
-            
-    if isinstance(workflow.get("nodes"), list):
-        for node in workflow["nodes"]:
-            node_type = get_node_type_str(node)
-            if node_type:
-                base_type = node_type.split(".")[-1]
-                if base_type:
-                    tags.add(base_type)
-                
-                service_tags = [
-                    "gmail", "google", "openai", "langchain", "webhook",
-                    "http", "database", "postgres", "supabase"
-                ]
-                for service in service_tags:
-                    if service in node_type:
-                        tags.add(service)
-                        
-    return sorted(list(tags))
-
-def analyze_complexity(workflow: Dict[str, Any]) -> Dict[str, Any]:
+    if features is None:
+        features = extract_features(workflow)
+    return sorted(features.tags)
+
+def analyze_complexity(workflow: Dict[str, Any], features: Optional[WorkflowFeatures] = None) -> Dict[str, Any]:
     """Analyze workflow complexity."""
+    if features is None:
+        features = extract_features(workflow)
     metrics = {
-        "nodeCount": 0,
-        "connectionCount": 0,
-        "uniqueNodeTypes": 0,
+        "nodeCount": features.node_count,
+        "connectionCount": features.connection_count,
+        "uniqueNodeTypes": len(features.type_counts),
         "complexity": "simple",
     }
-    
-    if isinstance(workflow.get("nodes"), list):
-        metrics["nodeCount"] = len(workflow["nodes"])
-        
-        node_type_set = {get_node_type_str(node) for node in workflow["nodes"] if get_node_type_str(node)}
-        metrics["uniqueNodeTypes"] = len(node_type_set)
-        
-    if isinstance(workflow.get("connections"), dict):
-        connection_count = 0
-        for conn in workflow["connections"].values():
-            if isinstance(conn.get("main"), list):
-                for main_conn in conn["main"]:
-                    if isinstance(main_conn, list):
-                        connection_count += len(main_conn)
-        metrics["connectionCount"] = connection_count
         
     if metrics["nodeCount"] > 15 or metrics["connectionCount"] > 20:
         metrics["complexity"] = "complex"
@@ -131,55 +219,121 @@ def analyze_complexity(workflow: Dict[str, Any]) -> Dict[str, Any]:
         
     return metrics
 
+def enrich_workflow(workflow: Dict[str, Any], filename: Optional[str] = None) -> Dict[str, Any]:
+    """Add the description, tags and complexity to one workflow.
+
+    Category and name come from the "<category>:<name>.json" filename of an
+    exported file, or from the workflow's own name when it was fetched from
+    n8n (filename None).
+    """
+    label = filename or workflow.get("name") or ""
+    features = extract_features(workflow)
+    return {
+        "id": workflow.get("id"),
+        "source": "file" if filename else "n8n",
+        "originalFilename": filename,
+        "category": extract_category(label),
+        "name": extract_name(label),
+        "description": generate_description(workflow, features),
+        "tags": extract_tags(workflow, features),
+        "complexity": analyze_complexity(workflow, features),
+        "originalWorkflow": workflow,
+    }
+
+def _enrich_workflow_file(file_path: Path) -> Optional[Dict[str, Any]]:
+    """Read and enrich one workflow file, raising on malformed input."""
+    with open(file_path, "r", encoding="utf-8") as f:
+        content = f.read()
+        if not content:
+            print(f"Warning: Skipping empty file {file_path}")
+            return None
+        workflow = json.loads(content)
+        
+    enriched_workflow = enrich_workflow(workflow, file_path.name)
+    if not enriched_workflow["id"]:
+        enriched_workflow["id"] = f"generated-{int(Path.stat(file_path).st_ctime)}"
+    return enriched_workflow
+
 def process_workflow(file_path: Path) -> Optional[Dict[str, Any]]:
     """Process a single workflow file."""
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            content = f.read()
-            if not content:
-                print(f"Warning: Skipping empty file {file_path}")
-                return None
-            workflow = json.loads(content)
-            
-        filename = file_path.name
-        category = extract_category(filename)
-        name = extract_name(filename)
-        description = generate_description(workflow)
-        tags = extract_tags(workflow)
-        complexity = analyze_complexity(workflow)
-        
-        enriched_workflow = {
-            "id": workflow.get("id") or f"generated-{int(Path.stat(file_path).st_ctime)}",
-            "originalFilename": filename,
-            "category": category,
-            "name": name,
-            "description": description,
-            "tags": tags,
-            "complexity": complexity,
-            "originalWorkflow": workflow,
-        }
-        
-        return enriched_workflow
+        return _enrich_workflow_file(file_path)
     except Exception as e:
         print(f"Error processing workflow {file_path}: {e}")
         return None
 
-def process_all_workflows():
+def _process_and_save(file_path: Path, output_dir: Path) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """Process one file and write its enriched copy; returns (workflow, error)."""
+    try:
+        processed_workflow = _enrich_workflow_file(file_path)
+        if processed_workflow:
+            output_path = output_dir / f"{processed_workflow['id']}.json"
+            with open(output_path, "w", encoding="utf-8") as f:
+                json.dump(processed_workflow, f, indent=2)
+        return processed_workflow, None
+    except Exception as e:
+        return None, f"{file_path}: {e}"
+
+def process_workflow_files(
+    workflow_files: List[Path],
+    output_dir: Path = OUTPUT_DIR,
+    workers: Optional[int] = None,
+    chunksize: Optional[int] = None,
+    on_progress: Optional[Callable[[int, int], None]] = None,
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Process workflow files, in a process pool when there are enough of them.
+
+    workers defaults to WORKFLOW_PARSER_WORKERS or the CPU count; 1 forces
+    serial parsing. Results keep the order of workflow_files regardless of
+    which worker finished first. on_progress(done, total) is called after
+    each file; if it raises, files not yet started are skipped. Returns the
+    processed workflows and one error message per file that could not be
+    processed.
+    """
+    if workers is None:
+        workers = int(os.getenv("WORKFLOW_PARSER_WORKERS", "0")) or os.cpu_count() or 1
+    process = partial(_process_and_save, output_dir=output_dir)
+
+    if workers <= 1 or len(workflow_files) < PARALLEL_MIN_FILES:
+        results = map(process, workflow_files)
+        return _collect(results, len(workflow_files), on_progress)
+
+    if chunksize is None:
+        # A few chunks per worker balances uneven file sizes against IPC overhead.
+        chunksize = max(1, len(workflow_files) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        results = executor.map(process, workflow_files, chunksize=chunksize)
+        try:
+            return _collect(results, len(workflow_files), on_progress)
+        finally:
+            # Cancels the chunks still queued when on_progress raised
+            results.close()
+
+def _collect(results, total: int = 0,
+             on_progress: Optional[Callable[[int, int], None]] = None) -> Tuple[List[Dict[str, Any]], List[str]]:
+    processed_workflows = []
+    errors = []
+    for done, (processed_workflow, error) in enumerate(results, 1):
+        if processed_workflow:
+            processed_workflows.append(processed_workflow)
+        if error:
+            errors.append(error)
+        if on_progress:
+            on_progress(done, total)
+    return processed_workflows, errors
+
+def process_all_workflows(workers: Optional[int] = None, chunksize: Optional[int] = None,
+                          on_progress: Optional[Callable[[int, int], None]] = None):
     """Main function to process all workflows."""
     try:
-        workflow_files = [f for f in WORKFLOWS_DIR.glob("*.json")]
+        workflow_files = sorted(WORKFLOWS_DIR.glob("*.json"))
         print(f"Found {len(workflow_files)} workflow files to process")
         
-        processed_workflows = []
-        for file_path in workflow_files:
-            processed_workflow = process_workflow(file_path)
-            
-            if processed_workflow:
-                processed_workflows.append(processed_workflow)
-                
-                output_path = OUTPUT_DIR / f"{processed_workflow['id']}.json"
-                with open(output_path, "w", encoding="utf-8") as f:
-                    json.dump(processed_workflow, f, indent=2)
+        processed_workflows, errors = process_workflow_files(
+            workflow_files, OUTPUT_DIR, workers, chunksize, on_progress
+        )
+        if errors:
+            logger.warning("Failed to process %d workflow files:\n  %s", len(errors), "\n  ".join(errors[:20]))
                     
         summary_path = OUTPUT_DIR / "workflows-summary.json"
         with open(summary_path, "w", encoding="utf-8") as f:
@@ -0,0 +1,68 @@
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from n8n_mcp.n8n_api_client import MAX_PAGE_SIZE
+from n8n_mcp.workflow_parser import enrich_workflow
+
+def parse_timestamp(value) -> Optional[datetime]:
+    """An n8n ISO 8601 timestamp (or a datetime read from PostgreSQL) as a datetime; None if missing or invalid."""
+    if value is None:
+        return None
+    if not isinstance(value, datetime):
+        try:
+            value = datetime.fromisoformat(str(value))
+        except ValueError:
+            return None
+    # Timestamps without an offset are taken as UTC so they compare with PostgreSQL's
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+def is_changed(workflow: Dict[str, Any], stored: Optional[Tuple[Optional[str], Any]],
+               high_water_mark: Optional[datetime]) -> bool:
+    """Whether a workflow listed by n8n differs from its stored (version_id, updated_at).
+
+    Anything updated after the high-water mark of the last completed sync
+    counts as changed, so a sync that stopped halfway redoes the rest of
+    its work next time. Older workflows are compared by versionId, or by
+    updatedAt when n8n does not report versions.
+    """
+    if stored is None:
+        return True
+    updated_at = parse_timestamp(workflow.get("updatedAt"))
+    if high_water_mark is None or updated_at is None or updated_at > high_water_mark:
+        return True
+    if workflow.get("versionId"):
+        return workflow["versionId"] != stored[0]
+    return updated_at != parse_timestamp(stored[1])
+
+def fetch_changed_workflows(
+    n8n_client,
+    stored_versions: Dict[str, Tuple[Optional[str], Any]],
+    high_water_mark: Optional[datetime] = None,
+    on_progress: Optional[Callable[[int, Optional[int]], None]] = None,
+    skip_ids: Optional[Set[str]] = None,
+) -> Tuple[List[Dict[str, Any]], Set[str], Optional[datetime]]:
+    """List every workflow in n8n and enrich only those changed since the last sync.
+
+    The n8n API cannot filter by update time, so the whole listing is read,
+    but only changed workflows are kept and parsed. Workflows in skip_ids
+    (stored from files under the same id) are listed but never parsed.
+    Returns the enriched changed workflows, the ids of all listed workflows
+    (to find deletions) and the newest updatedAt seen, the next high-water
+    mark. Listing errors raise, because a partial listing would look like
+    deletions.
+    """
+    changed, seen, newest = [], set(), high_water_mark
+    for page, _ in n8n_client.iter_workflow_pages(MAX_PAGE_SIZE, raise_errors=True):
+        for workflow in page:
+            if not workflow.get("id"):
+                continue
+            seen.add(workflow["id"])
+            updated_at = parse_timestamp(workflow.get("updatedAt"))
+            if updated_at is not None and (newest is None or updated_at > newest):
+                newest = updated_at
+            if skip_ids and workflow["id"] in skip_ids:
+                continue
+            if is_changed(workflow, stored_versions.get(workflow["id"]), high_water_mark):
+                changed.append(enrich_workflow(workflow))
+        if on_progress:
+            on_progress(len(seen), None)
+    return changed, seen, newest
@@ -1,157 +1,233 @@
-from typing import Any, Dict, List, Set
+import re
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Pattern, Set
+
+DEFAULT_VALIDATORS = ["naming", "errorHandling", "security", "performance", "documentation"]
+
+CREDENTIAL_KEYWORDS = ["api", "key", "token", "secret", "password", "auth"]
+
+@dataclass
+class ValidationContext:
+    """State shared by the rules while one workflow is validated."""
+    workflow: Dict[str, Any]
+    strictness: str
+    nodes: List[Dict[str, Any]]
+    # rule id -> values collected by that node rule during the traversal
+    hits: Dict[str, List[Any]] = field(default_factory=dict)
+    seen_names: Set[str] = field(default_factory=set)
+
+    @property
+    def lenient(self) -> bool:
+        return self.strictness == "low"
+
+@dataclass(frozen=True)
+class NodeRule:
+    """Checked once per node; returns the value to record for a hit, or None."""
+    rule_id: str
+    category: str
+    check: Callable[[Dict[str, Any], ValidationContext], Any]
+
+@dataclass(frozen=True)
+class WorkflowRule:
+    """Checked once per workflow after the traversal; returns the issue text, or None."""
+    rule_id: str
+    category: str
+    check: Callable[[ValidationContext], Optional[str]]
+    suggestion: str
+
+_NODE_RULES: List[NodeRule] = []
+_WORKFLOW_RULES: Dict[str, List[WorkflowRule]] = {}
+
+def node_rule(category: str, rule_id: str):
+    """Register a per-node rule for a validator category."""
+    def register(check):
+        _NODE_RULES.append(NodeRule(rule_id, category, check))
+        return check
+    return register
+
+def keyword_rule(category: str, rule_id: str, keywords: Iterable[str],
+                 select: Callable[[Dict[str, Any]], Optional[str]]):
+    """Register a node rule that matches any of keywords in the text select(node) returns.
+
+    The keywords are compiled into one case-insensitive alternation, so each
+    node's text is scanned once however many keywords there are.
+    """
+    pattern: Pattern[str] = re.compile("|".join(map(re.escape, keywords)), re.IGNORECASE)
+
+    def check(node, ctx):
+        text = select(node)
+        return node if text is not None and pattern.search(text) else None
+    _NODE_RULES.append(NodeRule(rule_id, category, check))
+
+def workflow_rule(category: str, rule_id: str, suggestion: str):
+    """Register a per-workflow rule; rules of a category report in registration order."""
+    def register(check):
+        _WORKFLOW_RULES.setdefault(category, []).append(WorkflowRule(rule_id, category, check, suggestion))
+        return check
+    return register
+
+# Naming
+
+@workflow_rule("naming", "naming.missingName", "Add a descriptive name to the workflow")
+def _missing_name(ctx):
+    if not ctx.workflow.get("name"):
+        return "Workflow name is missing"
+
+@workflow_rule("naming", "naming.shortName",
+               "Use a more descriptive name that indicates the workflow's purpose")
+def _short_name(ctx):
+    name = ctx.workflow.get("name")
+    if name and len(name) < 5 and not ctx.lenient:
+        return "Workflow name is too short"
+
+@node_rule("naming", "naming.defaultNodeNames")
+def _default_node_name(node, ctx):
+    name, node_type = node.get("name"), node.get("type")
+    if name and isinstance(node_type, str) and node_type.split(".")[-1] in name:
+        return name
+
+@node_rule("naming", "naming.duplicateNodeNames")
+def _duplicate_node_name(node, ctx):
+    name = node.get("name")
+    if not name:
+        return None
+    if name in ctx.seen_names:
+        return name
+    ctx.seen_names.add(name)
+
+@workflow_rule("naming", "naming.defaultNodeNames",
+               "Rename nodes to better describe their purpose in the workflow")
+def _default_node_names(ctx):
+    names = set(ctx.hits.get("naming.defaultNodeNames", ()))
+    if names and not ctx.lenient:
+        return f"{len(names)} nodes have default names"
+
+@workflow_rule("naming", "naming.duplicateNodeNames",
+               "Ensure each node has a unique name to avoid confusion")
+def _duplicate_node_names(ctx):
+    names = set(ctx.hits.get("naming.duplicateNodeNames", ()))
+    if names:
+        return f"Found {len(names)} duplicate node names"
+
+# Error handling
+
+@node_rule("errorHandling", "errorHandling.errorTrigger")
+def _error_trigger(node, ctx):
+    return node if node.get("type") == "n8n-nodes-base.errorTrigger" else None
+
+@workflow_rule("errorHandling", "errorHandling.missing",
+               "Add an Error Trigger node or set an error workflow in the settings")
+def _missing_error_handling(ctx):
+    has_error_workflow = (ctx.workflow.get("settings") or {}).get("errorWorkflow")
+    if not ctx.hits.get("errorHandling.errorTrigger") and not has_error_workflow and not ctx.lenient:
+        return "No error handling found in workflow"
+
+# Security
+
+keyword_rule(
+    "security", "security.hardcodedCredentials", CREDENTIAL_KEYWORDS,
+    lambda node: str(node["parameters"]) if "parameters" in node else None,
+)
+
+@workflow_rule("security", "security.hardcodedCredentials",
+               "Use credential objects instead of hard-coding sensitive information")
+def _hardcoded_credentials(ctx):
+    nodes = ctx.hits.get("security.hardcodedCredentials")
+    if nodes and not ctx.lenient:
+        return f"{len(nodes)} nodes potentially contain hard-coded credentials"
+
+# Performance
+
+@workflow_rule("performance", "performance.tooManyNodes",
+               "Consider breaking down complex workflows into smaller sub-workflows")
+def _too_many_nodes(ctx):
+    if len(ctx.nodes) > 50 and not ctx.lenient:
+        return f"Workflow has {len(ctx.nodes)} nodes, which may impact performance"
+
+# Documentation
+
+@workflow_rule("documentation", "documentation.missingDescription",
+               "Add a detailed description explaining the workflow's purpose and functionality")
+def _missing_description(ctx):
+    if not ctx.workflow.get("description") and not ctx.lenient:
+        return "Workflow description is missing"
+
+@node_rule("documentation", "documentation.stickyNote")
+def _sticky_note(node, ctx):
+    return node if node.get("type") == "n8n-nodes-base.stickyNote" else None
+
+@workflow_rule("documentation", "documentation.missingStickyNotes",
+               "Add sticky notes to document workflow sections and complex logic")
+def _missing_sticky_notes(ctx):
+    if not ctx.hits.get("documentation.stickyNote") and len(ctx.nodes) > 10 and not ctx.lenient:
+        return "No sticky notes found in a complex workflow"
+
+@workflow_rule("documentation", "documentation.missingTags",
+               "Add relevant tags to make the workflow more discoverable")
+def _missing_tags(ctx):
+    if not ctx.workflow.get("tags"):
+        return "No tags defined for the workflow"
+
+def run_validators(workflow: Dict[str, Any], validators: Iterable[str], strictness: str = "medium") -> Dict[str, Dict[str, Any]]:
+    """Run the rules of the given validators with a single traversal of the nodes."""
+    categories = [v for v in dict.fromkeys(validators) if v in _WORKFLOW_RULES]
+    nodes = workflow.get("nodes") if isinstance(workflow.get("nodes"), list) else []
+    ctx = ValidationContext(workflow, strictness, nodes)
+
+    node_rules = [rule for rule in _NODE_RULES if rule.category in categories]
+    if node_rules:
+        hits = ctx.hits
+        for node in nodes:
+            for rule in node_rules:
+                value = rule.check(node, ctx)
+                if value is not None:
+                    hits.setdefault(rule.rule_id, []).append(value)
 
-def validate_naming(workflow: Dict[str, Any], strictness: str = "medium") -> Dict[str, Any]:
-    issues: List[str] = []
-    suggestions: List[str] = []
-
-    if not workflow.get("name"):
-        issues.append("Workflow name is missing")
-        suggestions.append("Add a descriptive name to the workflow")
-    elif len(workflow.get("name", "")) < 5 and strictness != "low":
-        issues.append("Workflow name is too short")
-        suggestions.append("Use a more descriptive name that indicates the workflow's purpose")
-
-    if isinstance(workflow.get("nodes"), list):
-        default_node_names: Set[str] = set()
-        duplicate_node_names: Set[str] = set()
-        node_names: List[str] = [node.get("name") for node in workflow["nodes"] if node.get("name")]
-
-        for node in workflow["nodes"]:
-            if node.get("name") and node.get("type"):
-                node_type_name = node["type"].split(".")[-1]
-                if node_type_name in node["name"]:
-                    default_node_names.add(node["name"])
-            
-            if node.get("name") and node_names.count(node["name"]) > 1:
-                duplicate_node_names.add(node["name"])
-
-        if default_node_names and strictness != "low":
-            issues.append(f"{len(default_node_names)} nodes have default names")
-            suggestions.append("Rename nodes to better describe their purpose in the workflow")
-
-        if duplicate_node_names:
-            issues.append(f"Found {len(duplicate_node_names)} duplicate node names")
-            suggestions.append("Ensure each node has a unique name to avoid confusion")
+    results = {}
+    for category in categories:
+        issues: List[str] = []
+        suggestions: List[str] = []
+        failed_rules: List[str] = []
+        for rule in _WORKFLOW_RULES[category]:
+            issue = rule.check(ctx)
+            if issue:
+                issues.append(issue)
+                suggestions.append(rule.suggestion)
+                failed_rules.append(rule.rule_id)
+        results[category] = {
+            "category": category,
+            "passed": not issues,
+            "issues": issues,
+            "suggestions": suggestions,
+            "rules": failed_rules,
+        }
+    return results
 
-    return {
-        "category": "naming",
-        "passed": not issues,
-        "issues": issues,
-        "suggestions": suggestions,
-    }
+def validate_naming(workflow: Dict[str, Any], strictness: str = "medium") -> Dict[str, Any]:
+    return run_validators(workflow, ["naming"], strictness)["naming"]
 
 def validate_error_handling(workflow: Dict[str, Any], strictness: str = "medium") -> Dict[str, Any]:
-    issues: List[str] = []
-    suggestions: List[str] = []
-
-    has_error_trigger = any(
-        node.get("type") == "n8n-nodes-base.errorTrigger"
-        for node in workflow.get("nodes", [])
-    )
-    has_error_workflow = workflow.get("settings", {}).get("errorWorkflow")
-
-    if not has_error_trigger and not has_error_workflow and strictness != "low":
-        issues.append("No error handling found in workflow")
-        suggestions.append("Add an Error Trigger node or set an error workflow in the settings")
-
-    return {
-        "category": "errorHandling",
-        "passed": not issues,
-        "issues": issues,
-        "suggestions": suggestions,
-    }
+    return run_validators(workflow, ["errorHandling"], strictness)["errorHandling"]
 
 def validate_security(workflow: Dict[str, Any], strictness: str = "medium") -> Dict[str, Any]:
-    issues: List[str] = []
-    suggestions: List[str] = []
-
-    if isinstance(workflow.get("nodes"), list):
-        nodes_with_potential_hardcoded_credentials = [
-            node for node in workflow["nodes"]
-            if "parameters" in node and any(
-                keyword in str(node["parameters"]).lower()
-                for keyword in ["api", "key", "token", "secret", "password", "auth"]
-            )
-        ]
-        if nodes_with_potential_hardcoded_credentials and strictness != "low":
-            issues.append(f"{len(nodes_with_potential_hardcoded_credentials)} nodes potentially contain hard-coded credentials")
-            suggestions.append("Use credential objects instead of hard-coding sensitive information")
-
-    return {
-        "category": "security",
-        "passed": not issues,
-        "issues": issues,
-        "suggestions": suggestions,
-    }
+    return run_validators(workflow, ["security"], strictness)["security"]
 
 def validate_performance(workflow: Dict[str, Any], strictness: str = "medium") -> Dict[str, Any]:
-    issues: List[str] = []
-    suggestions: List[str] = []
-
-    if isinstance(workflow.get("nodes"), list):
-        if len(workflow["nodes"]) > 50 and strictness != "low":
-            issues.append(f"Workflow has {len(workflow['nodes'])} nodes, which may impact performance")
-            suggestions.append("Consider breaking down complex workflows into smaller sub-workflows")
-
-    return {
-        "category": "performance",
-        "passed": not issues,
-        "issues": issues,
-        "suggestions": suggestions,
-    }
+    return run_validators(workflow, ["performance"], strictness)["performance"]
 
 def validate_documentation(workflow: Dict[str, Any], strictness: str = "medium") -> Dict[str, Any]:
-    issues: List[str] = []
-    suggestions: List[str] = []
-
-    if not workflow.get("description") and strictness != "low":
-        issues.append("Workflow description is missing")
-        suggestions.append("Add a detailed description explaining the workflow's purpose and functionality")
-
-    sticky_notes = [
-        node for node in workflow.get("nodes", []) if node.get("type") == "n8n-nodes-base.stickyNote"
-    ]
-    if not sticky_notes and len(workflow.get("nodes", [])) > 10 and strictness != "low":
-        issues.append("No sticky notes found in a complex workflow")
-        suggestions.append("Add sticky notes to document workflow sections and complex logic")
-
-    if not workflow.get("tags"):
-        issues.append("No tags defined for the workflow")
-        suggestions.append("Add relevant tags to make the workflow more discoverable")
-
-    return {
-        "category": "documentation",
-        "passed": not issues,
-        "issues": issues,
-        "suggestions": suggestions,
-    }
+    return run_validators(workflow, ["documentation"], strictness)["documentation"]
 
 def validate_workflow(workflow: Dict[str, Any], options: Dict[str, Any] = None) -> Dict[str, Any]:
     if options is None:
         options = {}
-        
-    validators_to_run = options.get(
-        "validators", ["naming", "errorHandling", "security", "performance", "documentation"]
-    )
+
+    validators_to_run = options.get("validators", DEFAULT_VALIDATORS)
     strictness = options.get("strictness", "medium")
-    
-    results = {}
-    total_issues = 0
-    
-    validation_functions = {
-        "naming": validate_naming,
-        "errorHandling": validate_error_handling,
-        "security": validate_security,
-        "performance": validate_performance,
-        "documentation": validate_documentation,
-    }
-    
-    for validator in validators_to_run:
-        if validator in validation_functions:
-            result = validation_functions[validator](workflow, strictness)
-            results[validator] = result
-            total_issues += len(result["issues"])
-            
+
+    results = run_validators(workflow, validators_to_run, strictness)
+    total_issues = sum(len(result["issues"]) for result in results.values())
+
     return {
         "workflow": {"id": workflow.get("id"), "name": workflow.get("name")},
         "passed": total_issues == 0,